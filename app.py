@@ -1,8 +1,7 @@
 #app.py
 
 import streamlit as st
-from crewai import LLM
-from crew import LeadGenerationCrew
+from crew_pool import CrewPool
 from utils import (
     load_environment_variables,
     save_profile_data,
@@ -10,6 +9,7 @@ from utils import (
     UserProfile,
     logger,
 )
+from dedup import deduplicate_urls
 from typing import Dict, Any, List, Optional
 import os
 from pydantic import ValidationError
@@ -20,12 +20,15 @@ load_environment_variables()
 # --- Configuración de Streamlit ---
 st.set_page_config(page_title="LeadGen AI", page_icon="🚀", layout="wide")
 
-# --- Configuración de LLM (Gemini) ---
-gemini_llm = LLM(
-     model="gemini/gemini-pro",
-     api_key=os.environ.get("GEMINI_API_KEY"),
-     temperature=0.7,
- )
+# --- Pool de Crews (se construye una vez por proceso de Streamlit) ---
+# Una instancia por búsqueda concurrente; si todas están ocupadas se espera CREW_POOL_TIMEOUT segundos.
+# Las instancias se reconstruyen solas al editar agents.yaml/tasks.yaml.
+CREW_POOL_SIZE = int(os.environ.get("CREW_POOL_SIZE", 4))
+CREW_POOL_TIMEOUT = float(os.environ.get("CREW_POOL_TIMEOUT", 60))
+
+@st.cache_resource
+def get_crew_pool() -> CrewPool:
+    return CrewPool(size=CREW_POOL_SIZE, prewarm=False)
 
 # --- Funciones Auxiliares ---
 def run_crewai(input_data: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
@@ -53,9 +56,8 @@ def run_crewai(input_data: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
         user_profile_dict["website"] = str(user_profile_dict["website"])
 
     try:
-        crew_instance = LeadGenerationCrew()
         # Combinar input_data y el perfil
-        results = crew_instance.run(inputs={**crew_input_data, **user_profile_dict})
+        results = get_crew_pool().run(inputs={**crew_input_data, **user_profile_dict}, timeout=CREW_POOL_TIMEOUT)
         
         if results:
             if isinstance(results, list):
@@ -79,6 +81,11 @@ def run_crewai(input_data: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
             st.error("La búsqueda no devolvió resultados o falló.")
         return None
 
+    except TimeoutError as e:
+        logger.warning(f"Pool de crews ocupado: {e}")
+        st.warning("Hay demasiadas búsquedas en curso. Por favor, intenta de nuevo en unos minutos.")
+        return None
+
     except Exception as e:
         logger.error(f"Error en run_crewai: {e}", exc_info=True)
         st.error(f"Error al ejecutar CrewAI: {e}")
@@ -154,6 +161,7 @@ lead_keywords = st.text_input("Palabras Clave Adicionales del Lead (Opcional, se
 if st.button("Buscar Leads"):
     # Procesar las URLs ingresadas por el usuario
     company_urls = [url.strip() for url in company_urls_input.strip().split('\n') if url.strip()]
+    company_urls = deduplicate_urls(company_urls)  # URLs repetidas; los duplicados entre empresas se resuelven tras la investigación
 
     # Validar que no se excedan 3 URLs (opcional, pero buena práctica)
     if len(company_urls) > 3:
@@ -0,0 +1,175 @@
+#crawler.py
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple, Type
+from urllib.parse import urljoin, urldefrag, urlparse
+from urllib.robotparser import RobotFileParser
+
+import httpx
+from bs4 import BeautifulSoup
+from crewai.tools import BaseTool
+from pydantic import BaseModel, Field
+
+from utils import logger
+
+# --- Configuración del Crawler ---
+USER_AGENT = "LeadGenAI-Crawler/1.0"
+MAX_PAGES_PER_SITE = 5        # Página inicial + enlaces relevantes
+MAX_WORKERS = 4               # Peticiones concurrentes por sitio
+MAX_CHARS_PER_PAGE = 4000     # Texto máximo devuelto por página
+REQUEST_TIMEOUT = 10.0
+
+# Fragmentos de ruta/texto que indican páginas con datos de contacto
+RELEVANT_LINK_HINTS = (
+    "contact", "contacto", "contactanos", "about", "nosotros", "quienes-somos",
+    "quienes_somos", "acerca", "empresa", "team", "equipo",
+)
+
+EMAIL_REGEX = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+
+# --- Cliente HTTP compartido (pool de conexiones keep-alive) ---
+_client: Optional[httpx.Client] = None
+_client_lock = threading.Lock()
+
+def get_http_client() -> httpx.Client:
+    """Devuelve un cliente httpx compartido, creado una sola vez."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = httpx.Client(
+                headers={"User-Agent": USER_AGENT},
+                timeout=REQUEST_TIMEOUT,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+            )
+        return _client
+
+
+def _site_host(url: str) -> str:
+    """Host sin puerto ni 'www.', para comparar páginas del mismo sitio."""
+    host = urlparse(url).netloc.lower().split(":")[0]
+    return host[4:] if host.startswith("www.") else host
+
+
+class SiteCrawler:
+    """Recorre un sitio siguiendo un número acotado de enlaces relevantes del mismo dominio."""
+
+    def __init__(self, client: Optional[httpx.Client] = None, max_pages: int = MAX_PAGES_PER_SITE,
+                 max_workers: int = MAX_WORKERS, max_chars: int = MAX_CHARS_PER_PAGE):
+        self.client = client or get_http_client()
+        self.max_pages = max_pages
+        self.max_workers = max_workers
+        self.max_chars = max_chars
+        self._robots: Dict[str, Optional[RobotFileParser]] = {}
+        self._robots_lock = threading.Lock()
+
+    def _robots_for(self, url: str) -> Optional[RobotFileParser]:
+        """Descarga y cachea el robots.txt del host (None si no está disponible)."""
+        parsed = urlparse(url)
+        base = f"{parsed.scheme}://{parsed.netloc}"
+        with self._robots_lock:
+            if base in self._robots:
+                return self._robots[base]
+        parser = None
+        try:
+            response = self.client.get(f"{base}/robots.txt")
+            if response.status_code == 200:
+                parser = RobotFileParser()
+                parser.parse(response.text.splitlines())
+        except httpx.HTTPError as e:
+            logger.debug(f"No se pudo obtener robots.txt de {base}: {e}")
+        with self._robots_lock:
+            self._robots[base] = parser
+        return parser
+
+    def can_fetch(self, url: str) -> bool:
+        parser = self._robots_for(url)
+        return parser is None or parser.can_fetch(USER_AGENT, url)
+
+    def _fetch(self, url: str) -> Optional[Tuple[str, str]]:
+        """Descarga una página HTML; devuelve (URL final tras redirecciones, HTML) o None."""
+        if not self.can_fetch(url):
+            logger.info(f"URL bloqueada por robots.txt: {url}")
+            return None
+        try:
+            response = self.client.get(url)
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            logger.warning(f"Error al descargar {url}: {e}")
+            return None
+        final_url = str(response.url)
+        if final_url != url and not self.can_fetch(final_url):
+            logger.info(f"URL bloqueada por robots.txt tras redirección: {final_url}")
+            return None
+        if "html" not in response.headers.get("content-type", "html"):
+            return None
+        return final_url, response.text
+
+    def _relevant_links(self, base_url: str, soup: BeautifulSoup) -> List[str]:
+        """Enlaces del mismo sitio cuya ruta o texto sugieren contacto/nosotros/equipo."""
+        host = _site_host(base_url)
+        links = []
+        for anchor in soup.find_all("a", href=True):
+            link = urldefrag(urljoin(base_url, anchor["href"]))[0]
+            parsed = urlparse(link)
+            if parsed.scheme not in ("http", "https") or _site_host(link) != host:
+                continue
+            haystack = f"{parsed.path} {anchor.get_text(' ', strip=True)}".lower()
+            if any(hint in haystack for hint in RELEVANT_LINK_HINTS) and link not in links and link != base_url:
+                links.append(link)
+        return links
+
+    def _page_text(self, soup: BeautifulSoup) -> str:
+        for tag in soup(["script", "style", "noscript"]):
+            tag.decompose()
+        text = re.sub(r"\s+", " ", soup.get_text(" ", strip=True))
+        return text[:self.max_chars]
+
+    def crawl(self, url: str) -> Dict[str, str]:
+        """Devuelve {url: texto} para la página inicial y sus páginas relevantes."""
+        fetched = self._fetch(url)
+        if fetched is None:
+            return {}
+        base_url, html = fetched  # Los enlaces se resuelven contra la URL final (p.ej. acme.com -> www.acme.com)
+        soup = BeautifulSoup(html, "html.parser")
+        candidates = self._relevant_links(base_url, soup)[:self.max_pages - 1]
+        pages = {base_url: self._page_text(soup)}
+
+        host = _site_host(base_url)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for page in executor.map(self._fetch, candidates):
+                if page and _site_host(page[0]) != host:
+                    logger.info(f"Enlace redirigido fuera del sitio, se descarta: {page[0]}")
+                elif page and page[0] not in pages:
+                    pages[page[0]] = self._page_text(BeautifulSoup(page[1], "html.parser"))
+        logger.info(f"Crawl de {url} completado: {len(pages)} páginas")
+        return pages
+
+
+def format_page_bundle(pages: Dict[str, str]) -> str:
+    """Consolida las páginas en un solo texto, con los emails encontrados al inicio."""
+    if not pages:
+        return "No se pudo obtener contenido del sitio."
+    emails = sorted({email for text in pages.values() for email in EMAIL_REGEX.findall(text)})
+    bundle = f"Emails encontrados: {', '.join(emails) if emails else 'ninguno'}\n\n"
+    for page_url, text in pages.items():
+        bundle += f"## {page_url}\n{text}\n\n"
+    return bundle
+
+
+class SiteCrawlerSchema(BaseModel):
+    """Input para SiteCrawlerTool."""
+    website_url: str = Field(..., description="URL del sitio a analizar")
+
+
+class SiteCrawlerTool(BaseTool):
+    name: str = "Crawl company website"
+    description: str = (
+        "Descarga la página indicada y, en paralelo, sus páginas de contacto/nosotros/equipo "
+        "del mismo sitio. Devuelve todo el contenido consolidado en una sola llamada."
+    )
+    args_schema: Type[BaseModel] = SiteCrawlerSchema
+
+    def _run(self, website_url: str) -> str:
+        return format_page_bundle(SiteCrawler().crawl(website_url))
@@ -1,117 +1,29 @@
-from crewai import Crew, Task, LLM, Process, Agent
-from crewai_tools import ScrapeWebsiteTool
-from utils import logger, load_yaml_config, save_lead, CompanyData, EmailData, UserProfile # Importar UserProfile
-import os
+from crewai import Crew, Task, Process, Agent
+from crewai.tasks.conditional_task import ConditionalTask
+from crewai.agents.agent_builder.utilities.base_token_process import TokenProcess
+from crawler import SiteCrawlerTool
+from dedup import deduplicate_companies, normalize_company_name
+from router import ModelRouter
+from exporters import lead_record, export_leads
+from memory_policy import MemoryPolicy
+from parsing import parse_email_records, split_company_output, complete_company_records, format_company_output
+from sent_history import SentHistory, profile_key, DEFAULT_CAMPAIGN
+from utils import logger, load_yaml_config, save_lead, CompanyData, EmailData
 import json
 import datetime
-from pydantic import ValidationError
-
-# Configura el LLM para Gemini
-gemini_llm = LLM(
-    model="gemini/gemini-2.0-flash-exp",
-    api_key=os.environ.get("GEMINI_API_KEY"),
-    temperature=0.6,
-)
+from pydantic import Field, ValidationError
+from typing import Any, Dict, Optional
 
 class ReportingAnalystAgent(Agent):
-    """Agente Reporting Analyst con lógica para generar el reporte Markdown."""
-    def perform_task(self, task: Task):
-        report_date = task.inputs.get("report_date")
-        report_timestamp = task.inputs.get("report_timestamp")
-
-        markdown_report_content = "# Informe de Validación de Datos de Empresas\n\n" # Título en español
-        markdown_report_content += "Este informe resume los resultados de validación para la información de empresas, contenido de emails y perfiles de usuario.\n\n" # Descripción en español
-        markdown_report_content += f"## Fecha de Generación del Informe\n\n{report_date}\n\n---\n\n" # Encabezado fecha en español
-
-        research_results = task.context[1].output if task.context and len(task.context) > 1 and task.context[1].output else []
-        email_results = task.context[0].output if task.context and task.context[0].output else []
-        user_profile_data = task.crew.config.get("inputs", {}).get("user_profile_dict", {})
-
-        if not isinstance(research_results, list):
-            research_results = [research_results] if research_results else []
-
-        company_results = []
-        if isinstance(research_results, list) and isinstance(email_results, list):
-            company_results = list(zip(research_results, email_results))
-        elif isinstance(research_results, list) and not isinstance(email_results, list):
-            company_results = [(res, email_results) for res in research_results]
-        elif not isinstance(research_results, list) and isinstance(email_results, list):
-            company_results = [(research_results, email) for email in email_results]
-        else:
-            company_results = [(research_results, email_results)] if research_results or email_results else []
-
-
-        for research_result, email_result in company_results:
-            company_status = "success"
-            company_data_section = ""
-            email_content_section = ""
-            user_info_section = ""
-            validation_errors = None
-            validated_company_data = None # Inicializar fuera del try
-
-            try:
-                if research_result:
-                    validated_company_data = CompanyData(**research_result)
-                    company_data_dict = validated_company_data.model_dump()
-
-                    company_data_section = "### Información de la Empresa\n\n" # Encabezado en español
-                    company_data_section += f"*   **Nombre:** {company_data_dict.get('company_name', 'N/A')}\n"
-                    company_data_section += f"*   **Industria:** {company_data_dict.get('industry', 'N/A')}\n"
-                    company_data_section += f"*   **Descripción:** {company_data_dict.get('about', 'N/A')}\n"
+    """Agente Reporting Analyst: CrewAI redacta el reporte con el LLM; se omite si no hubo emails nuevos."""
+    # Valores por ejecución (fecha/timestamp del reporte), fijados en LeadGenerationCrew.reset
+    report_inputs: Dict[str, Any] = Field(default_factory=dict)
 
-                if email_result:
-                    validated_email_data = EmailData(**email_result)
-                    email_data_dict = validated_email_data.model_dump()
-
-                    email_content_section = "### Contenido del Email\n\n" # Encabezado en español
-                    email_content_section += f"*   **Asunto:** {email_data_dict.get('email_subject', 'N/A')}\n"
-                    email_content_section += "*   **Cuerpo:**\n    ```text\n" + email_data_dict.get('email_body', 'N/A') + "\n    ```\n"
-
-                validated_user_profile = UserProfile(**user_profile_data)
-                user_profile_dict = validated_user_profile.model_dump()
-
-                user_info_section = "### Información del Usuario\n\n" # Encabezado en español
-                user_info_section += f"*   **Nombre:** {user_profile_dict.get('name', 'N/A')}\n"
-                user_info_section += f"*   **Cargo:** {user_profile_dict.get('role', 'N/A')}\n"
-                user_info_section += f"*   **Información de Contacto:** {user_profile_dict.get('email', 'N/A')}\n"
-                user_info_section += f"*   **Especialización:** {', '.join(user_profile_dict.get('keywords', []))}\n"
-
-            except ValidationError as e:
-                company_status = "validation_error"
-                validation_errors = str(e)
-                company_data_section = ""
-                email_content_section = ""
-                user_info_section = ""
-
-            company_name = validated_company_data.company_name if validated_company_data and validated_company_data.company_name else 'Empresa' # Nombre de empresa en español
-            markdown_report_content += f"## {company_name}\n\n" # Encabezado empresa en español
-            markdown_report_content += f"**Estado:** {company_status}\n\n" # Estado en español
-            markdown_report_content += f"**Timestamp:** {report_timestamp}\n\n"
-            markdown_report_content += "**Datos:**\n\n" # Datos en español
-
-            if company_status == "success":
-                markdown_report_content += company_data_section
-                markdown_report_content += email_content_section
-                markdown_report_content += user_info_section
-            elif company_status == "validation_error":
-                markdown_report_content += f"**Errores de Validación:** {validation_errors}\n\n" # Errores en español
-
-            markdown_report_content += "---\n\n"
-
-        output_file_path = task.output_file
-
-        try:
-            with open(output_file_path, "w", encoding="utf-8") as f:
-                f.write(markdown_report_content)
-            logger.info(f"Reporte generado y guardado en: {output_file_path}") # Log en español
-            return "Reporte generado exitosamente" # Mensaje en español
-        except Exception as e:
-            logger.error(f"Error al guardar el reporte en Markdown: {e}", exc_info=True) # Log error en español
-            return f"Error al generar el reporte: {e}" # Mensaje error en español
-
-
-    def run(self, task: Task, context):
-        return self.perform_task(task)
+    def execute_task(self, task: Task, context: Optional[str] = None, tools: Optional[list] = None) -> str:
+        # Si todas las empresas investigadas estaban en cooldown no hay nada que reportar: se evita la llamada al LLM
+        if self.report_inputs.get("outreach_skipped"):
+            return "No se generaron emails: todas las empresas encontradas fueron contactadas recientemente."
+        return super().execute_task(task, context=context, tools=tools)
 
 
 class LeadGenerationCrew:
@@ -120,12 +32,27 @@ class LeadGenerationCrew:
     agents_config_path = "config/agents.yaml"
     tasks_config_path = "config/tasks.yaml"
 
-    def __init__(self, config_agents=None, config_tasks=None):
+    def __init__(self, config_agents=None, config_tasks=None, sent_history: Optional[SentHistory] = None):
+        self._configs_from_files = config_agents is None and config_tasks is None
         self.agents_config = config_agents or load_yaml_config(self.agents_config_path)
         self.tasks_config = config_tasks or load_yaml_config(self.tasks_config_path)
         if self.agents_config is None or self.tasks_config is None:
             raise ValueError("No se pudieron cargar las configuraciones YAML.")
 
+        # Modelos por agente (con cobertura por latencia) definidos en agents.yaml
+        self.router = ModelRouter(self.agents_config.get("model_routing"))
+        # Memoria acotada (entradas/bytes, LRU + TTL) compartida por los agentes; desactivada por defecto
+        self.memory_policy = MemoryPolicy(self.agents_config.get("memory_policy"))
+        # Empresas ya contactadas por (perfil, campaña): no se regenera su email durante el cooldown
+        self.sent_history = sent_history or SentHistory()
+        self._run_profile_key = None
+        self._run_campaign = DEFAULT_CAMPAIGN
+        # LLM para re-preguntar solo los campos que falten al validar las salidas de las tareas
+        self.parser_llm = self.router.llm_for("parser")
+        # Registros validados de la ejecución en curso (los completan los callbacks de las tareas)
+        self._run_companies = []
+        self._run_emails = []
+
         # Inicialización diferida de agentes y tareas
         self._business_researcher = None
         self._sales_copywriter = None
@@ -142,26 +69,28 @@ class LeadGenerationCrew:
           agents=self.agents,
           tasks=self.tasks,
           process=Process.sequential,
-          verbose=True
+          verbose=True,
+          **self.memory_policy.crew_kwargs()
         )
 
 
     @property
     def business_researcher(self):
         if self._business_researcher is None:
-            self._business_researcher = Agent(config=self.agents_config["researcher"], tools=[ScrapeWebsiteTool()], llm=gemini_llm, verbose=True, allow_delegation=False, max_iter=7, memory=True)
+            # memory=True solo tiene efecto si memory_policy.enabled activa la memoria de la crew
+            self._business_researcher = Agent(config=self.agents_config["researcher"], tools=[SiteCrawlerTool()], llm=self.router.llm_for("researcher"), verbose=True, allow_delegation=False, max_iter=7, memory=True)
         return self._business_researcher
 
     @property
     def sales_copywriter(self):
         if self._sales_copywriter is None:
-            self._sales_copywriter = Agent(config=self.agents_config["sales_copywriter"], llm=gemini_llm, verbose=True, allow_delegation=False)
+            self._sales_copywriter = Agent(config=self.agents_config["sales_copywriter"], llm=self.router.llm_for("sales_copywriter"), verbose=True, allow_delegation=False)
         return self._sales_copywriter
 
     @property
     def reporting_analyst(self):
         if self._reporting_analyst is None:
-            self._reporting_analyst = ReportingAnalystAgent(config=self.agents_config["reporting_analyst"], llm=gemini_llm, verbose=True, allow_delegation=False) # Usar la clase ReportingAnalystAgent
+            self._reporting_analyst = ReportingAnalystAgent(config=self.agents_config["reporting_analyst"], llm=self.router.llm_for("reporting_analyst"), verbose=True, allow_delegation=False) # Usar la clase ReportingAnalystAgent
         return self._reporting_analyst
 
 
@@ -172,7 +101,8 @@ class LeadGenerationCrew:
             self._research_business_task = Task(
                 description=task_config['description'],
                 expected_output=task_config['expected_output'],
-                agent=self.business_researcher
+                agent=self.business_researcher,
+                callback=self._process_research_output  # Antes de la etapa de email
             )
         return self._research_business_task
 
@@ -180,11 +110,14 @@ class LeadGenerationCrew:
     def create_sales_email_task(self):
         if self._create_sales_email_task is None:
             task_config = self.tasks_config["create_sales_email_task"]
-            self._create_sales_email_task = Task(
+            # Se omite si todas las empresas investigadas están en cooldown (ver _process_research_output)
+            self._create_sales_email_task = ConditionalTask(
+                condition=self._has_pending_outreach,
                 description=task_config['description'],
                 expected_output=task_config['expected_output'],
                 agent=self.sales_copywriter,
-                context=[self.research_business_task]
+                context=[self.research_business_task],
+                callback=self._process_email_output
             )
         return self._create_sales_email_task
 
@@ -197,9 +130,7 @@ class LeadGenerationCrew:
                 expected_output=task_config['expected_output'],
                 agent=self.reporting_analyst,
                 context=[self.create_sales_email_task, self.research_business_task], # Asegúrate de que research_business_task esté en context
-                output_file=task_config['output_file'],
-                inputs={"report_date": datetime.datetime.now().strftime("%Y-%m-%d"),
-                        "report_timestamp": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+                output_file=task_config['output_file']  # Plantilla: se interpola con output_dir en cada ejecución
             )
         return self._create_report_task
 
@@ -212,14 +143,151 @@ class LeadGenerationCrew:
       return [self.research_business_task, self.create_sales_email_task, self.create_report_task]
 
 
+    def is_stale(self) -> bool:
+        """True si agents.yaml o tasks.yaml cambiaron desde que se construyó la instancia
+        (la lectura está cacheada por mtime/hash, así que la comprobación es barata)."""
+        if not self._configs_from_files:
+            return False
+        return (load_yaml_config(self.agents_config_path) != self.agents_config
+                or load_yaml_config(self.tasks_config_path) != self.tasks_config)
+
+    def reset(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        """Prepara la instancia para una nueva ejecución y devuelve los inputs para kickoff.
+
+        Agentes, tareas, herramientas y LLMs se reutilizan; solo se renuevan los valores
+        por ejecución (fecha/timestamp del reporte, directorio de salida, memoria, caché
+        de herramientas y contadores de tokens).
+        """
+        now = datetime.datetime.now()
+        run_inputs = {
+            "output_dir": "output",
+            **inputs,
+            "report_date": now.strftime("%Y-%m-%d"),
+            "report_timestamp": now.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        self._run_profile_key = profile_key(run_inputs)
+        self._run_campaign = run_inputs.get("campaign", DEFAULT_CAMPAIGN)
+        if isinstance(run_inputs.get("company_urls"), list):
+            run_inputs["company_urls"], deferred = self.sent_history.filter_urls(
+                run_inputs["company_urls"], self._run_profile_key, self._run_campaign)
+            if deferred:
+                logger.info(f"URLs diferidas por contacto reciente: {deferred}")
+
+        self.reporting_analyst.report_inputs = {
+            "report_date": run_inputs["report_date"],
+            "report_timestamp": run_inputs["report_timestamp"],
+            "profile_key": self._run_profile_key,
+            "campaign": self._run_campaign,
+        }
+        self.memory_policy.start_run()
+        # La caché de herramientas de CrewAI devolvería páginas de sitios ya rastreadas en otra ejecución
+        self.crew._cache_handler._cache.clear()
+        for agent in self.agents:
+            agent._token_process = TokenProcess()  # crew.usage_metrics cuenta solo esta ejecución
+        self._run_companies, self._run_emails = [], []
+        for task in self.tasks:
+            task.output = None  # Una tarea omitida no debe exponer la salida de la ejecución anterior
+        return run_inputs
+
+    def _process_research_output(self, output) -> None:
+        """Callback de research_business_task, antes de la etapa de email: deja un registro
+        canónico por empresa (resolución de entidades) y quita las empresas contactadas
+        dentro del cooldown, para que el copywriter no escriba dos veces a la misma.
+
+        La salida se reescribe en el mismo TaskOutput que reciben las tareas siguientes, con
+        los registros ya validados (re-preguntando solo los campos que falten); la prosa y
+        los objetos sin nombre de empresa se conservan.
+        """
+        records, others, prose = split_company_output(output)
+        companies = deduplicate_companies(records)
+        pending, deferred = self.sent_history.filter_companies(companies, self._run_profile_key, self._run_campaign)
+        self._run_companies = complete_company_records(pending, self.parser_llm, output)
+        if records:
+            output.raw = format_company_output(self._run_companies, others, prose)
+            output.json_dict = None
+        if deferred and not pending:
+            logger.info("Todas las empresas encontradas fueron contactadas recientemente; se omiten el email y el reporte.")
+            self.reporting_analyst.report_inputs["outreach_skipped"] = True
+
+    def _has_pending_outreach(self, _research_output) -> bool:
+        """Condición de create_sales_email_task."""
+        return not self.reporting_analyst.report_inputs.get("outreach_skipped")
+
+    def _process_email_output(self, output) -> None:
+        """Callback de create_sales_email_task: valida el email generado (asunto, cuerpo, keywords)
+        y registra las empresas contactadas en el historial de envíos."""
+        self._run_emails = parse_email_records(output, llm=self.parser_llm)
+        for company, email in self._paired_emails():
+            if email:
+                self.sent_history.record(company, self._run_profile_key, self._run_campaign)
+
+    def _paired_emails(self):
+        """Pares (empresa, email) de la ejecución; email es None si ninguno se le puede atribuir.
+
+        Un email se atribuye a la empresa que indica su `company_name` o, si no lo trae, a la
+        que nombra en el asunto (o, en su defecto, en el cuerpo). Así un email para una sola
+        empresa no se registra como enviado a todas, y si el copywriter omite alguna el resto
+        no queda desplazado.
+        """
+        names = {index: normalize_company_name(company.get("company_name"))
+                 for index, company in enumerate(self._run_companies)}
+        assigned: Dict[int, Dict[str, Any]] = {}
+        for email in self._run_emails:
+            index = self._email_company(email, names)
+            if index is None or index in assigned:
+                logger.warning(f"Email sin empresa atribuible, no se registra: {email.get('email_subject')}")
+                continue
+            assigned[index] = email
+        return [(company, assigned.get(index)) for index, company in enumerate(self._run_companies)]
+
+    @staticmethod
+    def _email_company(email: Dict[str, Any], names: Dict[int, str]) -> Optional[int]:
+        """Índice de la empresa a la que va dirigido el email, o None si no se puede saber."""
+        if email.get("company_name"):
+            target = normalize_company_name(email["company_name"])
+            return next((index for index, name in names.items() if name and name == target), None)
+        for text in (email.get("email_subject"), email.get("email_body")):
+            text = f" {normalize_company_name(text)} "
+            matches = [index for index, name in names.items() if name and f" {name} " in text]
+            # "Acme" también aparece dentro de "Acme Logística": gana el nombre más largo
+            matches = [index for index in matches
+                       if not any(names[index] != names[other] and f" {names[index]} " in f" {names[other]} "
+                                  for other in matches)]
+            if matches:
+                return matches[0] if len({names[index] for index in matches}) == 1 else None
+        return None
+
+    def _run_leads(self):
+        """Pares (empresa, email) validados de la ejecución."""
+        leads = []
+        for company, email in self._paired_emails():
+            try:
+                leads.append((CompanyData(**company), EmailData(**email) if email else None))
+            except ValidationError as e:
+                logger.warning(f"Lead descartado por errores de validación ({company.get('company_name')}): {e}")
+        return leads
+
+    def _export_leads(self, leads, output_dir: str) -> None:
+        try:
+            export_leads([lead_record(company, email) for company, email in leads], output_dir)
+        except Exception as e:
+            logger.error(f"Error al exportar los leads: {e}", exc_info=True)
+
     def run(self, inputs):
         logger.info("Iniciando LeadGenerationCrew.run con inputs: %s", inputs)
 
         # Ejecuta la crew
         try:
+            inputs = self.reset(inputs)
+            if inputs.get("company_urls") == []:
+                logger.info("Todas las empresas fueron contactadas recientemente; no se ejecuta la crew.")
+                return None
             results = self.crew.kickoff(inputs=inputs)
             logger.info("Crew completada. Resultados: %s", results)
+            self._export_leads(self._run_leads(), inputs["output_dir"])
             return results
         except Exception as e:
             logger.exception("Error durante la ejecución de la crew:")
-            return None
\ No newline at end of file
+            return None
+        finally:
+            logger.info("Tamaño de la memoria de la crew: %s", self.memory_policy.stats())
\ No newline at end of file
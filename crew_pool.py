@@ -0,0 +1,82 @@
+#crew_pool.py
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from crew import LeadGenerationCrew
+from utils import logger
+
+
+class CrewPool:
+    """Pool de instancias de LeadGenerationCrew ya construidas (agentes, tareas, herramientas y LLMs).
+
+    Cada instancia la usa un solo hilo a la vez: se toma con `acquire`, se reinicia con
+    los inputs de la ejecución dentro de `LeadGenerationCrew.run` y se devuelve con `release`.
+    """
+
+    def __init__(self, size: int = 2, factory: Callable[[], LeadGenerationCrew] = LeadGenerationCrew,
+                 prewarm: bool = True):
+        if size < 1:
+            raise ValueError("El tamaño del pool debe ser al menos 1.")
+        self.size = size
+        self.factory = factory
+        self._idle: "queue.LifoQueue[LeadGenerationCrew]" = queue.LifoQueue()  # Se reutiliza la más reciente
+        self._created = 0
+        self._lock = threading.Lock()
+        if prewarm:
+            for _ in range(size):
+                self._created += 1
+                self._idle.put(self.factory())
+            logger.info(f"Pool de crews pre-calentado con {size} instancias")
+
+    def _fresh(self, crew_instance: LeadGenerationCrew) -> LeadGenerationCrew:
+        """Reconstruye la instancia si agents.yaml/tasks.yaml cambiaron desde que se creó."""
+        is_stale = getattr(crew_instance, "is_stale", None)
+        if is_stale is None or not is_stale():
+            return crew_instance
+        logger.info("Configuración modificada: se reconstruye la instancia de crew del pool")
+        try:
+            return self.factory()
+        except Exception as e:
+            logger.error(f"No se pudo reconstruir la crew con la nueva configuración: {e}", exc_info=True)
+            return crew_instance
+
+    def acquire(self, timeout: Optional[float] = None) -> LeadGenerationCrew:
+        """Toma una instancia libre; crea una nueva si el pool no está completo o espera `timeout`."""
+        try:
+            return self._fresh(self._idle.get_nowait())
+        except queue.Empty:
+            pass
+        with self._lock:
+            can_create = self._created < self.size
+            if can_create:
+                self._created += 1  # Se reserva el cupo antes de construir (fuera del lock)
+        if can_create:
+            try:
+                return self.factory()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        try:
+            crew_instance = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError("No hay instancias de crew disponibles en el pool.") from None
+        return self._fresh(crew_instance)
+
+    def release(self, crew_instance: LeadGenerationCrew) -> None:
+        self._idle.put(crew_instance)
+
+    @contextmanager
+    def crew(self, timeout: Optional[float] = None) -> Iterator[LeadGenerationCrew]:
+        crew_instance = self.acquire(timeout=timeout)
+        try:
+            yield crew_instance
+        finally:
+            self.release(crew_instance)
+
+    def run(self, inputs: Dict[str, Any], timeout: Optional[float] = None) -> Any:
+        """Ejecuta la crew con una instancia del pool."""
+        with self.crew(timeout=timeout) as crew_instance:
+            return crew_instance.run(inputs)
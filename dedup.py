@@ -0,0 +1,217 @@
+#dedup.py
+import re
+import unicodedata
+import zlib
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+from urllib.parse import urlparse
+
+import numpy as np
+
+from utils import logger
+
+# --- Normalización de nombres y dominios ---
+
+# Sufijos societarios que no distinguen a una empresa de otra
+LEGAL_SUFFIXES = {
+    "sa", "srl", "sas", "sac", "sau", "saic", "sca", "scs", "ltda", "ltd", "llc", "inc",
+    "corp", "co", "company", "gmbh", "plc", "spa", "cia", "y", "de", "the",
+}
+
+# Dominios de directorios/redes sociales: no identifican a una empresa concreta
+AGGREGATOR_DOMAINS = {
+    "facebook.com", "instagram.com", "linkedin.com", "twitter.com", "x.com", "google.com",
+    "goo.gl", "paginasamarillas.com.ar", "guiaempresas.com.ar", "yelp.com", "wa.me",
+}
+
+def normalize_company_name(name: Optional[str]) -> str:
+    """Minúsculas, sin acentos, sin puntuación ni sufijos societarios."""
+    if not name:
+        return ""
+    text = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii").lower()
+    text = re.sub(r"\b([a-z])\.(?=[a-z]\.)", r"\1", text)  # "s.a." -> "sa."
+    tokens = re.findall(r"[a-z0-9]+", text)
+    return " ".join(token for token in tokens if token not in LEGAL_SUFFIXES)
+
+def normalize_domain(url: Optional[Any]) -> Optional[str]:
+    """Devuelve el dominio sin esquema ni 'www.', o None si es un agregador."""
+    if not url:
+        return None
+    url = str(url).strip().lower()
+    if "://" not in url:
+        url = f"http://{url}"
+    host = urlparse(url).netloc.split(":")[0]
+    if host.startswith("www."):
+        host = host[4:]
+    if not host or host in AGGREGATOR_DOMAINS:
+        return None
+    return host
+
+# --- MinHash / LSH ---
+
+_MERSENNE_PRIME = (1 << 31) - 1
+
+def company_shingles(record: Dict[str, Any]) -> Set[str]:
+    """Trigramas de caracteres del nombre y bigramas de palabras de la descripción."""
+    name = normalize_company_name(record.get("company_name"))
+    compact = name.replace(" ", "")
+    shingles = {f"n:{compact[i:i + 3]}" for i in range(max(len(compact) - 2, 1))} if compact else set()
+    words = re.findall(r"[a-z0-9]+", normalize_company_name(record.get("about")))
+    shingles.update(f"d:{a} {b}" for a, b in zip(words, words[1:]))
+    return shingles
+
+
+class MinHashLSH:
+    """Índice MinHash con bandas LSH para encontrar candidatos en tiempo casi lineal.
+
+    Cada bucket guarda un solo representante por grupo y como máximo `max_bucket_size`
+    grupos: con descripciones repetidas (p.ej. fichas de un directorio) muchos registros
+    distintos caen en el mismo bucket y compararlos todos entre sí sería cuadrático.
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, seed: int = 42, max_bucket_size: int = 32):
+        if num_perm % bands != 0:
+            raise ValueError("num_perm debe ser múltiplo de bands.")
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.max_bucket_size = max_bucket_size
+        self._a = rng.randint(1, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._buckets: Dict[tuple, Dict[int, int]] = {}
+
+    def signature(self, shingles: Iterable[str]) -> np.ndarray:
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64)
+        if hashes.size == 0:
+            return np.full(self.num_perm, _MERSENNE_PRIME, dtype=np.uint64)
+        permuted = (self._a[:, None] * hashes[None, :] + self._b[:, None]) % _MERSENNE_PRIME
+        return permuted.min(axis=1)
+
+    def insert(self, key: int, signature: np.ndarray, root: Optional[Callable[[int], int]] = None) -> List[int]:
+        """Indexa la firma y devuelve las claves ya indexadas que comparten alguna banda.
+
+        `root` devuelve el grupo actual de una clave (union-find); sin él, cada clave es su
+        propio grupo. Un bucket lleno se compacta a un representante por grupo y, si sigue
+        lleno, la clave nueva no se agrega (se compara, pero no queda como candidata).
+        """
+        root = root or (lambda k: k)
+        candidates: List[int] = []
+        for band in range(self.bands):
+            bucket_key = (band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+            bucket = self._buckets.setdefault(bucket_key, {})
+            if len(bucket) >= self.max_bucket_size:
+                bucket = {root(member): member for member in bucket.values()}
+                self._buckets[bucket_key] = bucket
+            candidates.extend(bucket.values())
+            if len(bucket) < self.max_bucket_size:
+                bucket.setdefault(root(key), key)
+        return list(dict.fromkeys(candidates))
+
+# --- Resolución de entidades ---
+
+def _completeness(record: Dict[str, Any]) -> int:
+    return sum(1 for value in record.values() if value)
+
+def cluster_companies(records: List[Dict[str, Any]], threshold: float = 0.6,
+                      num_perm: int = 64, bands: int = 16) -> List[List[int]]:
+    """Agrupa los índices de registros que representan a la misma empresa.
+
+    Dos registros se unen si comparten dominio o nombre normalizado, o si la
+    similitud MinHash estimada de sus shingles supera `threshold`, salvo que sus
+    grupos tengan dominios propios distintos (dos "Servicios S.A." con sitios
+    diferentes son dos empresas). Los registros sin shingles (p.ej. nombre "S.A."
+    y sin descripción) no pasan por LSH. Cada grupo se devuelve con el registro
+    más completo en primer lugar.
+    """
+    parent = list(range(len(records)))
+    domains = [normalize_domain(record.get("website")) for record in records]
+    group_domains: Dict[int, Set[str]] = {i: {domain} for i, domain in enumerate(domains) if domain}
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(i: int, j: int) -> None:
+        root_i, root_j = find(i), find(j)
+        if root_i == root_j:
+            return
+        domains_i, domains_j = group_domains.get(root_i), group_domains.get(root_j)
+        if domains_i and domains_j and domains_i.isdisjoint(domains_j):
+            return  # Mismo nombre o descripción, pero sitios distintos
+        keep, drop = min(root_i, root_j), max(root_i, root_j)
+        parent[drop] = keep
+        if drop in group_domains:
+            group_domains.setdefault(keep, set()).update(group_domains.pop(drop))
+
+    exact_keys: Dict[str, int] = {}
+    lsh = MinHashLSH(num_perm=num_perm, bands=bands)
+    signatures = np.zeros((len(records), num_perm), dtype=np.uint64)
+
+    for index, record in enumerate(records):
+        for key in (f"domain:{domains[index]}",
+                    f"name:{normalize_company_name(record.get('company_name'))}"):
+            if key in ("domain:None", "name:"):
+                continue
+            if key in exact_keys:
+                union(index, exact_keys[key])
+            else:
+                exact_keys[key] = index
+
+        shingles = company_shingles(record)
+        if not shingles:
+            continue  # Firma degenerada: uniría todos los registros vacíos entre sí
+        signatures[index] = lsh.signature(shingles)
+        # Un candidato por grupo, comparados de una vez
+        candidates = list({find(c): c for c in lsh.insert(index, signatures[index], root=find)}.values())
+        if candidates:
+            similarity = np.mean(signatures[candidates] == signatures[index], axis=1)
+            for candidate in np.asarray(candidates)[similarity >= threshold]:
+                union(index, int(candidate))
+
+    groups: Dict[int, List[int]] = {}
+    for index in range(len(records)):
+        groups.setdefault(find(index), []).append(index)
+
+    clusters = [sorted(members, key=lambda i: (-_completeness(records[i]), i)) for members in groups.values()]
+    duplicates = len(records) - len(clusters)
+    if duplicates:
+        logger.info(f"Resolución de entidades: {duplicates} duplicados en {len(records)} empresas")
+    return clusters
+
+def merge_cluster(records: List[Dict[str, Any]], cluster: List[int]) -> Dict[str, Any]:
+    """Registro canónico: el más completo, completado con los campos vacíos de sus duplicados."""
+    canonical = dict(records[cluster[0]])
+    for index in cluster[1:]:
+        for field, value in records[index].items():
+            if value and not canonical.get(field):
+                canonical[field] = value
+    return canonical
+
+def deduplicate_companies(records: List[Dict[str, Any]], threshold: float = 0.6) -> List[Dict[str, Any]]:
+    """Devuelve un registro canónico por empresa, en el orden de primera aparición."""
+    clusters = sorted(cluster_companies(records, threshold=threshold), key=min)
+    return [merge_cluster(records, cluster) for cluster in clusters]
+
+def normalize_url(url: str) -> str:
+    """URL sin esquema, 'www.', fragmento ni barra final: las páginas distintas de un
+    mismo sitio (p.ej. secciones de un directorio) siguen siendo distintas."""
+    text = str(url).strip()
+    parsed = urlparse(text if "://" in text else f"http://{text}")
+    host = parsed.netloc.lower().split(":")[0]
+    if host.startswith("www."):
+        host = host[4:]
+    path = parsed.path.rstrip("/")
+    return f"{host}{path}?{parsed.query}" if parsed.query else f"{host}{path}"
+
+def deduplicate_urls(urls: List[str]) -> List[str]:
+    """Elimina URLs repetidas (misma URL normalizada; se conserva la primera)."""
+    seen: Set[str] = set()
+    unique = []
+    for url in urls:
+        key = normalize_url(url)
+        if key not in seen:
+            seen.add(key)
+            unique.append(url)
+    return unique
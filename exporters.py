@@ -0,0 +1,184 @@
+#exporters.py
+import atexit
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils import logger, CompanyData, EmailData
+
+# --- Esquema columnar de un lead exportado ---
+LEAD_SCHEMA = pa.schema([
+    ("company_name", pa.string()),
+    ("industry", pa.string()),
+    ("province", pa.string()),
+    ("website", pa.string()),
+    ("email", pa.string()),
+    ("instagram", pa.string()),
+    ("facebook", pa.string()),
+    ("about", pa.string()),
+    ("source", pa.string()),
+    ("fecha_consulta", pa.string()),
+    ("email_subject", pa.string()),
+    ("email_body", pa.string()),
+    ("email_keywords", pa.list_(pa.string())),
+    ("generated_at", pa.string()),
+    ("exported_at", pa.string()),
+])
+
+def lead_record(company: CompanyData, email: Optional[EmailData] = None) -> Dict[str, Any]:
+    """Aplana los modelos validados en un registro plano (las URLs como str)."""
+    record = company.model_dump(mode="json")
+    email_data = email.model_dump(mode="json") if email else {}
+    record["email_subject"] = email_data.get("email_subject")
+    record["email_body"] = email_data.get("email_body")
+    record["email_keywords"] = email_data.get("keywords", [])
+    record["generated_at"] = email_data.get("generated_at")
+    record["exported_at"] = datetime.now().isoformat(timespec="seconds")
+    return record
+
+
+class JsonlLeadSink:
+    """Escritor JSONL de solo-añadido: una línea por lead, volcada al escribirse."""
+
+    def __init__(self, path: str = "output/leads.jsonl"):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def write(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._file.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+def _parquet_path(directory: str) -> str:
+    return os.path.join(directory, f"leads_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.parquet")
+
+def _write_parquet_file(path: str, table: pa.Table, row_group_size: int, compression: str) -> None:
+    """Escribe el archivo completo con otro nombre y lo renombra: los lectores nunca ven uno a medias."""
+    directory, name = os.path.split(path)
+    tmp_path = os.path.join(directory, f".{name}.tmp")  # pyarrow.dataset ignora los archivos ocultos
+    pq.write_table(table, tmp_path, row_group_size=row_group_size, compression=compression)
+    os.replace(tmp_path, path)
+
+
+class ParquetLeadSink:
+    """Escritor Parquet por lotes, pensado para vivir todo el proceso (ver `get_lead_sinks`).
+
+    Acumula leads en memoria y escribe un archivo completo dentro de `directory`, con row
+    groups de `row_group_size`, cada `rows_per_file` filas o en cada `flush` (al final de
+    cada ejecución, ver `export_leads`), así un corte del proceso no pierde lo ya exportado.
+    Cada `compact_every` archivos escritos se unen los pequeños con `compact_parquet`, para
+    que el directorio se lea como un dataset (`pyarrow.dataset`) sin miles de archivos diminutos.
+    """
+
+    def __init__(self, directory: str = "output/leads", row_group_size: int = 10000,
+                 rows_per_file: Optional[int] = None, compression: str = "zstd",
+                 compact_every: int = 20):
+        self.directory = directory
+        self.row_group_size = row_group_size
+        self.rows_per_file = rows_per_file or row_group_size
+        self.compression = compression
+        self.compact_every = compact_every
+        self._files_written = 0
+        self._buffer: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _write_file(self, rows: List[Dict[str, Any]]) -> None:
+        path = _parquet_path(self.directory)
+        _write_parquet_file(path, pa.Table.from_pylist(rows, schema=LEAD_SCHEMA),
+                            self.row_group_size, self.compression)
+        logger.info(f"{len(rows)} leads exportados a Parquet: {path}")
+        self._files_written += 1
+        if self.compact_every and self._files_written >= self.compact_every:
+            compact_parquet(self.directory, self.row_group_size, self.compression)
+            self._files_written = 0
+
+    def write(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            self._buffer.append(record)
+            if len(self._buffer) >= self.rows_per_file:
+                rows, self._buffer = self._buffer, []
+                self._write_file(rows)
+
+    def flush(self) -> None:
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+            if rows:
+                self._write_file(rows)
+
+    def close(self) -> None:
+        self.flush()
+
+
+def compact_parquet(directory: str = "output/leads", row_group_size: int = 10000,
+                    compression: str = "zstd") -> Optional[str]:
+    """Une en un solo archivo los Parquet con menos de `row_group_size` filas (p.ej. los que
+    deja cada ejecución). Devuelve la ruta del archivo nuevo, o None."""
+    small = []
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if name.endswith(".parquet") and not name.startswith(".") and \
+                pq.ParquetFile(path).metadata.num_rows < row_group_size:
+            small.append(path)
+    if len(small) < 2:
+        return None
+    table = pa.concat_tables(pq.read_table(path, schema=LEAD_SCHEMA) for path in small)
+    compacted = _parquet_path(directory)
+    _write_parquet_file(compacted, table, row_group_size, compression)
+    for path in small:
+        os.remove(path)
+    logger.info(f"Compactados {len(small)} archivos Parquet ({table.num_rows} leads) en {compacted}")
+    return compacted
+
+
+# --- Sinks compartidos por el proceso (uno por directorio de salida) ---
+_sinks: Dict[str, List[Any]] = {}
+_sinks_lock = threading.Lock()
+
+def get_lead_sinks(output_dir: str = "output") -> List[Any]:
+    """Sinks por defecto del pipeline: JSONL acumulativo y Parquet por lotes, creados una vez por proceso."""
+    with _sinks_lock:
+        if output_dir not in _sinks:
+            _sinks[output_dir] = [
+                JsonlLeadSink(os.path.join(output_dir, "leads.jsonl")),
+                ParquetLeadSink(os.path.join(output_dir, "leads")),
+            ]
+        return _sinks[output_dir]
+
+def close_lead_sinks() -> None:
+    """Vuelca y cierra todos los sinks compartidos (se llama también al salir del proceso)."""
+    with _sinks_lock:
+        sinks = [sink for group in _sinks.values() for sink in group]
+        _sinks.clear()
+    for sink in sinks:
+        sink.close()
+
+atexit.register(close_lead_sinks)
+
+def export_leads(records: List[Dict[str, Any]], output_dir: str = "output") -> None:
+    """Escribe los leads de una ejecución en los sinks compartidos y los vuelca a disco."""
+    sinks = get_lead_sinks(output_dir)
+    for record in records:
+        for sink in sinks:
+            sink.write(record)
+    if records:
+        for sink in sinks:
+            sink.flush()
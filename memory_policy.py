@@ -0,0 +1,171 @@
+#memory_policy.py
+import json
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from crewai.memory import EntityMemory, LongTermMemory, ShortTermMemory
+from crewai.memory.storage.interface import Storage
+from pydantic import BaseModel
+
+
+class MemoryPolicyConfig(BaseModel):
+    """Modelo de Pydantic para la sección `memory_policy` de agents.yaml."""
+    enabled: bool = False               # True suma una llamada al LLM por tarea (evaluación de largo plazo)
+    scope: str = "run"                  # "run": la memoria de corto plazo/entidades se vacía en cada ejecución
+    max_entries: int = 200              # Entradas máximas por memoria
+    max_bytes: int = 256_000            # Tamaño máximo por memoria
+    ttl_seconds: Optional[float] = 3600 # Antigüedad máxima de una entrada (None = sin TTL)
+
+
+def _tokens(text: str) -> set:
+    return set(re.findall(r"\w+", text.lower()))
+
+
+class BoundedMemoryStorage(Storage):
+    """Almacenamiento en memoria con presupuesto de entradas/bytes y desalojo LRU + TTL.
+
+    Sustituye al RAGStorage de CrewAI: la búsqueda es por solapamiento de palabras,
+    así que no necesita embeddings ni crece en disco.
+    """
+
+    def __init__(self, max_entries: int = 200, max_bytes: int = 256_000,
+                 ttl_seconds: Optional[float] = 3600, scope: str = "run"):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.scope = scope
+        self.run_id: Optional[str] = None
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def start_run(self, run_id: str) -> None:
+        """Marca el inicio de una ejecución; con scope "run" descarta lo anterior."""
+        with self._lock:
+            self.run_id = run_id
+            if self.scope == "run":
+                self._entries.clear()
+                self._bytes = 0
+
+    def _remove(self, entry_id: str) -> None:
+        entry = self._entries.pop(entry_id)
+        self._bytes -= entry["size"]
+        self.evictions += 1
+
+    def _evict(self) -> None:
+        if self.ttl_seconds is not None:
+            deadline = time.monotonic() - self.ttl_seconds
+            for entry_id in [key for key, entry in self._entries.items() if entry["created_at"] < deadline]:
+                self._remove(entry_id)
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            self._remove(next(iter(self._entries)))  # El menos usado recientemente
+
+    def save(self, value: Any, metadata: Dict[str, Any]) -> None:
+        context = str(value)
+        entry = {
+            "id": str(uuid.uuid4()),
+            "context": context,
+            "metadata": metadata or {},
+            "created_at": time.monotonic(),
+            "size": len(context.encode("utf-8")) + len(json.dumps(metadata, default=str).encode("utf-8")),
+        }
+        with self._lock:
+            self._entries[entry["id"]] = entry
+            self._bytes += entry["size"]
+            self._evict()
+
+    def _entries_snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            self._evict()
+            return list(self._entries.values())
+
+    def _touch(self, entry_ids: List[str]) -> None:
+        with self._lock:
+            for entry_id in entry_ids:
+                if entry_id in self._entries:
+                    self._entries.move_to_end(entry_id)
+
+    def search(self, query: str, limit: int = 3, score_threshold: float = 0.35) -> List[Dict[str, Any]]:
+        """Devuelve las `limit` entradas con más palabras en común con la consulta.
+
+        `score_threshold` se ignora: la puntuación no es comparable con la de embeddings.
+        """
+        query_tokens = _tokens(query)
+        scored = []
+        for entry in self._entries_snapshot():
+            entry_tokens = _tokens(entry["context"])
+            if query_tokens and entry_tokens:
+                score = len(query_tokens & entry_tokens) / len(entry_tokens)
+                if score > 0:
+                    scored.append((score, entry))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        results = [{"id": entry["id"], "context": entry["context"], "metadata": entry["metadata"], "score": score}
+                   for score, entry in scored[:limit]]
+        self._touch([result["id"] for result in results])
+        return results
+
+    def reset(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "evictions": self.evictions}
+
+
+class BoundedLongTermStorage(BoundedMemoryStorage):
+    """Versión acotada del LTMSQLiteStorage de CrewAI (misma interfaz save/load)."""
+
+    def save(self, task_description: str, metadata: Dict[str, Any], datetime: str, score: float) -> None:  # type: ignore[override]
+        super().save(task_description, {"metadata": metadata, "datetime": datetime, "score": score})
+
+    def load(self, task_description: str, latest_n: int) -> List[Dict[str, Any]]:
+        matches = [entry for entry in self._entries_snapshot() if entry["context"] == task_description]
+        matches.sort(key=lambda entry: entry["metadata"]["datetime"], reverse=True)
+        self._touch([entry["id"] for entry in matches[:latest_n]])
+        return [entry["metadata"] for entry in matches[:latest_n]]
+
+
+class MemoryPolicy:
+    """Memorias acotadas de la crew, configuradas desde `memory_policy` en agents.yaml.
+
+    Por defecto la memoria de la crew está desactivada (como antes): al activarla, CrewAI
+    guarda la memoria de largo plazo evaluando cada tarea con una llamada extra al LLM.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = MemoryPolicyConfig(**(config or {}))
+        budget = {"max_entries": self.config.max_entries, "max_bytes": self.config.max_bytes,
+                  "ttl_seconds": self.config.ttl_seconds}
+        self.short_term = BoundedMemoryStorage(scope=self.config.scope, **budget)
+        self.entities = BoundedMemoryStorage(scope=self.config.scope, **budget)
+        # La memoria de largo plazo se conserva entre ejecuciones; solo la limita el presupuesto
+        self.long_term = BoundedLongTermStorage(scope="worker", **budget)
+
+    def crew_kwargs(self) -> Dict[str, Any]:
+        """Argumentos de memoria para el constructor de `Crew`."""
+        if not self.config.enabled:
+            return {"memory": False}
+        return {
+            "memory": True,
+            "short_term_memory": ShortTermMemory(storage=self.short_term),
+            "entity_memory": EntityMemory(storage=self.entities),
+            "long_term_memory": LongTermMemory(storage=self.long_term),
+        }
+
+    def start_run(self, run_id: Optional[str] = None) -> str:
+        run_id = run_id or str(uuid.uuid4())
+        for storage in (self.short_term, self.entities, self.long_term):
+            storage.start_run(run_id)
+        return run_id
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Métrica de tamaño de cada memoria (entradas, bytes y desalojos)."""
+        return {"short_term": self.short_term.stats(), "entities": self.entities.stats(),
+                "long_term": self.long_term.stats()}
@@ -0,0 +1,340 @@
+#parsing.py
+import json
+import re
+import unicodedata
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type, Union
+
+import json_repair
+from pydantic import BaseModel, ValidationError
+
+from utils import logger, CompanyData, EmailData
+
+# --- Extracción incremental de JSON en texto libre ---
+
+class JsonStreamExtractor:
+    """Extrae objetos/arrays JSON de texto libre a medida que llegan los fragmentos.
+
+    Lleva la cuenta de llaves/corchetes y comillas, así que la prosa, los bloques
+    ```json``` y los objetos consecutivos no necesitan preprocesado. La comilla simple
+    sólo abre una cadena en posición de clave/valor (tras `{ [ , :`), para que los
+    apóstrofos de la prosa ("Acme's") no se traguen el resto de la salida. Un candidato
+    que no resulta en objetos JSON (p.ej. `[Contacto](https://...)`) vuelve a la prosa
+    y el escaneo se reanuda un carácter después de su apertura.
+    """
+
+    def __init__(self):
+        self._text: List[str] = []  # Todo lo que no resultó ser JSON válido
+        self._reset()
+
+    def _reset(self) -> None:
+        self._buffer: List[str] = []
+        self._stack: List[str] = []
+        self._quote: Optional[str] = None
+        self._escaped = False
+        self._last = ""  # Último carácter no blanco del candidato, fuera de comillas
+
+    def _candidate(self) -> Optional[Any]:
+        """Valor del candidato actual si contiene objetos JSON, o None."""
+        value = loads_tolerant("".join(self._buffer))
+        return value if value is not None and _flatten_objects([value]) else None
+
+    def _rejected(self) -> str:
+        """Descarta el candidato: su apertura pasa a la prosa y devuelve el resto para re-escanearlo."""
+        self._text.append(self._buffer[0])
+        rest = "".join(self._buffer[1:])
+        self._reset()
+        return rest
+
+    def feed(self, chunk: str) -> List[Any]:
+        """Procesa un fragmento y devuelve los valores JSON que quedaron completos."""
+        values = []
+        index = 0
+        while index < len(chunk):
+            char = chunk[index]
+            index += 1
+            if not self._stack:
+                if char in "{[":
+                    self._stack.append("}" if char == "{" else "]")
+                    self._buffer = [char]
+                    self._last = char
+                else:
+                    self._text.append(char)
+                continue
+
+            self._buffer.append(char)
+            if self._quote:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == self._quote:
+                    self._quote = None
+                    self._last = char
+                continue
+            if char == '"' or (char == "'" and self._last in "{[,:"):
+                self._quote = char
+            elif char in "{[":
+                self._stack.append("}" if char == "{" else "]")
+            elif char in "}]":
+                self._stack.pop()
+                if not self._stack:
+                    value = self._candidate()
+                    if value is not None:
+                        values.append(value)
+                        self._reset()
+                    else:
+                        chunk, index = self._rejected() + chunk[index:], 0
+                    continue
+            if not char.isspace():
+                self._last = char
+        return values
+
+    def close(self) -> List[Any]:
+        """Intenta recuperar un valor truncado al final del flujo."""
+        values = []
+        while self._stack:
+            value = self._candidate()
+            if value is not None:
+                values.append(value)
+                self._reset()
+            else:
+                values.extend(self.feed(self._rejected()))
+        return values
+
+    def text(self) -> str:
+        """Prosa procesada hasta ahora, sin los valores JSON extraídos."""
+        return "".join(self._text)
+
+def loads_tolerant(candidate: str) -> Optional[Any]:
+    """json.loads con reparación de defectos habituales (comas finales, comillas simples, etc.)."""
+    try:
+        return json.loads(candidate)
+    except json.JSONDecodeError:
+        pass
+    repaired = candidate.translate(str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"}))
+    repaired = re.sub(r",\s*([}\]])", r"\1", repaired)
+    try:
+        return json.loads(repaired)
+    except json.JSONDecodeError:
+        pass
+    value = json_repair.loads(repaired)
+    return value if isinstance(value, (dict, list)) and value else None
+
+def split_json_and_text(chunks: Union[str, Iterable[str]]) -> Tuple[List[Any], str]:
+    """Valores JSON del texto y la prosa que los rodea (sin los bloques ```json``` que quedan vacíos)."""
+    if isinstance(chunks, str):
+        chunks = [chunks]
+    extractor = JsonStreamExtractor()
+    values = []
+    for chunk in chunks:
+        values.extend(extractor.feed(chunk))
+    values.extend(extractor.close())
+    return values, re.sub(r"```\w*\s*```", "", extractor.text()).strip()
+
+def _flatten_objects(values: List[Any]) -> List[Dict[str, Any]]:
+    objects = []
+    for value in values:
+        if isinstance(value, dict):
+            objects.append(value)
+        elif isinstance(value, list):
+            objects.extend(item for item in value if isinstance(item, dict))
+    return objects
+
+def extract_json_objects(chunks: Union[str, Iterable[str]]) -> List[Dict[str, Any]]:
+    """Todos los objetos JSON del texto (los arrays de objetos se aplanan)."""
+    return _flatten_objects(split_json_and_text(chunks)[0])
+
+# --- Mapeo de campos ---
+
+COMPANY_FIELD_ALIASES = {
+    "company_name": ("company_name", "company", "name", "nombre", "nombre_empresa", "empresa", "razon_social"),
+    "industry": ("industry", "industria", "rubro", "sector"),
+    "province": ("province", "provincia", "location", "ubicacion", "region", "city", "ciudad"),
+    "website": ("website", "website_url", "url", "sitio_web", "web", "site"),
+    "email": ("email", "emails", "e_mail", "correo", "correo_electronico", "mail", "contact_email"),
+    "instagram": ("instagram",),
+    "facebook": ("facebook",),
+    "about": ("about", "description", "brief_description", "descripcion", "summary", "resumen"),
+    "source": ("source", "fuente", "source_url", "extracted_from"),
+    "fecha_consulta": ("fecha_consulta", "fecha", "date"),
+}
+
+EMAIL_FIELD_ALIASES = {
+    "email_subject": ("email_subject", "subject", "asunto", "subject_line"),
+    "email_body": ("email_body", "body", "cuerpo", "content", "text"),
+    "keywords": ("keywords", "palabras_clave", "tags"),
+    "generated_at": ("generated_at", "fecha", "date"),
+    "company_name": ("company_name", "company", "empresa"),  # Destinatario, para atribuir el email
+}
+
+def _normalize_key(key: str) -> str:
+    key = unicodedata.normalize("NFKD", str(key)).encode("ascii", "ignore").decode("ascii").lower()
+    return re.sub(r"[^a-z0-9]+", "_", key).strip("_")
+
+def _flatten(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Normaliza las claves y sube un nivel los diccionarios anidados (p.ej. contact_information)."""
+    flat: Dict[str, Any] = {}
+    nested: Dict[str, Any] = {}
+    for key, value in data.items():
+        if isinstance(value, dict):
+            nested.update({_normalize_key(k): v for k, v in value.items()})
+        else:
+            flat[_normalize_key(key)] = value
+    for key, value in nested.items():
+        flat.setdefault(key, value)
+    return flat
+
+def map_fields(data: Dict[str, Any], aliases: Dict[str, Iterable[str]]) -> Dict[str, Any]:
+    """Traduce las claves de un objeto del LLM a los campos del modelo."""
+    flat = _flatten(data)
+    mapped: Dict[str, Any] = {}
+    for field, candidates in aliases.items():
+        for candidate in candidates:
+            if flat.get(candidate) not in (None, "", []):
+                mapped[field] = flat[candidate]
+                break
+
+    # Redes sociales que llegan como lista de enlaces
+    links = [v for value in flat.values() if isinstance(value, list) for v in value if isinstance(v, str)]
+    for network in ("instagram", "facebook"):
+        if network in aliases and not mapped.get(network):
+            mapped[network] = next((link for link in links if f"{network}.com" in link), None)
+    return {field: value for field, value in mapped.items() if value is not None}
+
+def _coerce(record: Dict[str, Any], model: Type[BaseModel]) -> Dict[str, Any]:
+    """Listas -> primer elemento en campos str; descarta opcionales inválidos."""
+    for field, info in model.model_fields.items():
+        value = record.get(field)
+        if isinstance(value, list) and info.annotation != List[str]:
+            record[field] = next((str(v) for v in value if v), None)
+        elif isinstance(value, (int, float)) and info.annotation is str:
+            record[field] = str(value)
+    try:
+        model(**record)
+    except ValidationError as e:
+        for error in e.errors():
+            field = error["loc"][0] if error["loc"] else None
+            if field in model.model_fields and not model.model_fields[field].is_required():
+                record[field] = None
+    return record
+
+def missing_fields(record: Dict[str, Any], model: Type[BaseModel]) -> List[str]:
+    """Campos obligatorios del modelo que faltan o son inválidos."""
+    try:
+        model(**record)
+        return []
+    except ValidationError as e:
+        return list(dict.fromkeys(str(error["loc"][0]) for error in e.errors() if error["loc"]))
+
+# --- Re-prompt solo de los campos faltantes ---
+
+def build_missing_fields_prompt(record: Dict[str, Any], missing: List[str], source_text: str) -> str:
+    """Construye un prompt que pide ÚNICAMENTE los campos faltantes."""
+    return (
+        f"From the text below, extract ONLY these fields for the company "
+        f"'{record.get('company_name', 'unknown')}': {', '.join(missing)}.\n"
+        f"Answer with a single JSON object with exactly those keys. "
+        f"Use an empty string when the information is not present.\n\n"
+        f"Text:\n{source_text}"
+    )
+
+def fill_missing_fields(record: Dict[str, Any], model: Type[BaseModel], aliases: Dict[str, Iterable[str]],
+                        llm: Any, source_text: str, max_chars: int = 6000) -> Dict[str, Any]:
+    """Completa con una única llamada al LLM los campos que faltan en `record`."""
+    missing = missing_fields(record, model)
+    if not missing or llm is None:
+        return record
+    logger.info(f"Re-prompt de campos faltantes para {record.get('company_name', 'registro')}: {missing}")
+    try:
+        response = llm.call(build_missing_fields_prompt(record, missing, source_text[:max_chars]))
+    except Exception as e:
+        logger.error(f"Error al re-preguntar campos faltantes: {e}", exc_info=True)
+        return record
+    for patch in extract_json_objects(str(response))[:1]:
+        patch = map_fields(patch, aliases)
+        record.update({field: value for field, value in patch.items() if field in missing})
+    return _coerce(record, model)
+
+# --- API de alto nivel ---
+
+def _output_text(output: Any) -> str:
+    if output is None:
+        return ""
+    if isinstance(output, (dict, list)):
+        return json.dumps(output, ensure_ascii=False, default=str)
+    return str(getattr(output, "raw", None) or output)
+
+def _output_objects(output: Any) -> List[Dict[str, Any]]:
+    if isinstance(output, dict):
+        return [output]
+    if isinstance(output, list):
+        return [item for item in output if isinstance(item, dict)]
+    json_dict = getattr(output, "json_dict", None)
+    if json_dict:
+        return [json_dict]
+    return extract_json_objects(_output_text(output))
+
+def split_company_output(output: Any, llm: Any = None, source: str = "research_business_task"
+                         ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], str]:
+    """Como parse_company_records, pero conserva lo que no se pudo mapear:
+    (registros de CompanyData, objetos sin nombre de empresa, prosa fuera del JSON)."""
+    source_text = _output_text(output)
+    if isinstance(output, (dict, list)) or getattr(output, "json_dict", None):
+        objects, prose = _output_objects(output), ""
+    else:
+        values, prose = split_json_and_text(source_text)
+        objects = _flatten_objects(values)
+
+    records, others = [], []
+    for obj in objects:
+        record = map_fields(obj, COMPANY_FIELD_ALIASES)
+        if not record.get("company_name"):
+            others.append(obj)
+            continue
+        record.setdefault("source", source)
+        record.setdefault("fecha_consulta", datetime.now().strftime("%Y-%m-%d"))
+        record = _coerce(record, CompanyData)
+        records.append(fill_missing_fields(record, CompanyData, COMPANY_FIELD_ALIASES, llm, source_text))
+    return records, others, prose
+
+def parse_company_records(output: Any, llm: Any = None, source: str = "research_business_task") -> List[Dict[str, Any]]:
+    """Convierte la salida del researcher (dict, lista, TaskOutput o texto) en registros de CompanyData."""
+    return split_company_output(output, llm=llm, source=source)[0]
+
+def complete_company_records(records: List[Dict[str, Any]], llm: Any, output: Any) -> List[Dict[str, Any]]:
+    """Re-pregunta al LLM solo los campos obligatorios que falten (una llamada por registro incompleto)."""
+    source_text = _output_text(output)
+    return [fill_missing_fields(record, CompanyData, COMPANY_FIELD_ALIASES, llm, source_text) for record in records]
+
+def format_company_output(records: List[Dict[str, Any]], others: List[Dict[str, Any]], prose: str = "") -> str:
+    """Reescribe la salida del researcher: la prosa original y un bloque JSON con los registros."""
+    block = "```json\n" + json.dumps(records + others, ensure_ascii=False, indent=2, default=str) + "\n```"
+    return f"{prose}\n\n{block}" if prose else block
+
+def parse_email_text(text: str) -> Dict[str, Any]:
+    """Separa asunto y cuerpo de un email en texto plano."""
+    text = re.sub(r"^```\w*\s*|```\s*$", "", text.strip())
+    match = re.search(r"^\W*(?:subject|asunto)\W*:\s*(.+)$", text, re.IGNORECASE | re.MULTILINE)
+    if not match:
+        return {"email_body": text} if text else {}
+    return {"email_subject": match.group(1).strip(" *"), "email_body": text[match.end():].strip()}
+
+def parse_email_records(output: Any, llm: Any = None) -> List[Dict[str, Any]]:
+    """Convierte la salida del copywriter en registros de EmailData."""
+    objects = _output_objects(output)
+    candidates = [map_fields(obj, EMAIL_FIELD_ALIASES) for obj in objects]
+    candidates = [candidate for candidate in candidates if candidate.get("email_body")]
+    if not candidates and not objects:  # Un JSON sin cuerpo (p.ej. sólo la dirección) no es un email
+        candidates = [parse_email_text(_output_text(output))] if output else []
+
+    records = []
+    for record in candidates:
+        if not record:
+            continue
+        if isinstance(record.get("keywords"), str):
+            record["keywords"] = [k.strip() for k in record["keywords"].split(",") if k.strip()]
+        record.setdefault("keywords", [])
+        record.setdefault("generated_at", datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        records.append(fill_missing_fields(record, EmailData, EMAIL_FIELD_ALIASES, llm, record.get("email_body", "")))
+    return records
@@ -0,0 +1,168 @@
+#router.py
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, Optional
+
+from crewai import LLM
+
+from utils import logger
+
+# Modelo por defecto si agents.yaml no define `model_routing`
+DEFAULT_MODEL = {"model": "gemini/gemini-2.0-flash-exp", "temperature": 0.6}
+
+# Hilos por router (es decir, por crew) para las llamadas primarias y, aparte, las de cobertura
+DEFAULT_MAX_WORKERS = 4
+
+
+class LatencyTracker:
+    """Guarda una ventana móvil de latencias por clave (agente:modelo)."""
+
+    def __init__(self, window: int = 50):
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, model: str, seconds: float) -> None:
+        with self._lock:
+            self._samples.setdefault(model, deque(maxlen=self.window)).append(seconds)
+
+    def count(self, model: str) -> int:
+        with self._lock:
+            return len(self._samples.get(model, ()))
+
+    def percentile(self, model: str, pct: float) -> Optional[float]:
+        """Percentil `pct` (0-100) de las latencias registradas, o None si no hay muestras."""
+        with self._lock:
+            samples = sorted(self._samples.get(model, ()))
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(pct / 100 * (len(samples) - 1))))
+        return samples[index]
+
+
+class HedgedLLM(LLM):
+    """LLM que lanza una petición de cobertura al modelo secundario si el primario tarda
+    más que el percentil configurado de su latencia, y devuelve la primera respuesta."""
+
+    def __init__(self, primary: Any, secondary: Optional[Any] = None, tracker: Optional[LatencyTracker] = None,
+                 percentile: float = 95, min_samples: int = 10, initial_hedge_after: Optional[float] = None,
+                 agent_name: str = "default", executor: Optional[ThreadPoolExecutor] = None,
+                 hedge_executor: Optional[ThreadPoolExecutor] = None):
+        super().__init__(model=primary.model, temperature=getattr(primary, "temperature", None))
+        self.primary = primary
+        self.secondary = secondary
+        self.tracker = tracker or LatencyTracker()
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.initial_hedge_after = initial_hedge_after
+        self.agent_name = agent_name
+        # Las llamadas perdedoras no se cancelan: la cobertura usa su propio pool para no
+        # quedar encolada detrás de primarios lentos que siguen corriendo
+        self.executor = executor or ThreadPoolExecutor(max_workers=DEFAULT_MAX_WORKERS, thread_name_prefix="llm-router")
+        self.hedge_executor = hedge_executor or ThreadPoolExecutor(max_workers=DEFAULT_MAX_WORKERS,
+                                                                   thread_name_prefix="llm-hedge")
+
+    def latency_key(self, llm: Any) -> str:
+        """Las latencias se llevan por agente y modelo: un mismo modelo tarda distinto según el agente."""
+        return f"{self.agent_name}:{llm.model}"
+
+    def hedge_after(self) -> Optional[float]:
+        """Segundos a esperar al primario antes de lanzar la cobertura (None = no cubrir)."""
+        if self.secondary is None:
+            return None
+        key = self.latency_key(self.primary)
+        if self.tracker.count(key) < self.min_samples:
+            return self.initial_hedge_after
+        return self.tracker.percentile(key, self.percentile)
+
+    def _timed_call(self, llm: Any, *args, **kwargs) -> Any:
+        start = time.monotonic()
+        try:
+            return llm.call(*args, **kwargs)
+        finally:
+            self.tracker.record(self.latency_key(llm), time.monotonic() - start)
+
+    def call(self, *args, **kwargs) -> Any:
+        # CrewAI fija las stop words sobre el LLM del agente; se propagan a los modelos reales
+        for llm in (self.primary, self.secondary):
+            if llm is not None:
+                llm.stop = self.stop
+
+        if self.secondary is None:
+            return self._timed_call(self.primary, *args, **kwargs)
+
+        primary = self.executor.submit(self._timed_call, self.primary, *args, **kwargs)
+        done, _ = wait([primary], timeout=self.hedge_after())
+        if done and primary.exception() is None:
+            return primary.result()
+
+        if done:
+            logger.warning(f"Error en {self.primary.model}: {primary.exception()}. Usando {self.secondary.model}")
+        else:
+            logger.info(f"{self.primary.model} superó el umbral de latencia, cubriendo con {self.secondary.model}")
+        pending = {primary, self.hedge_executor.submit(self._timed_call, self.secondary, *args, **kwargs)} - done
+
+        error = primary.exception() if done else None
+        while pending:
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+        raise error
+
+
+def _build_llm(model_config: Dict[str, Any]) -> LLM:
+    return LLM(
+        model=model_config["model"],
+        api_key=os.environ.get(model_config.get("api_key_env", "GEMINI_API_KEY")),
+        temperature=model_config.get("temperature"),
+    )
+
+
+class ModelRouter:
+    """Asigna a cada agente su modelo (y modelo de cobertura) según `model_routing` en agents.yaml."""
+
+    def __init__(self, routing_config: Optional[Dict[str, Any]] = None,
+                 model_factory: Callable[[Dict[str, Any]], Any] = _build_llm,
+                 tracker: Optional[LatencyTracker] = None):
+        routing_config = routing_config or {}
+        self.models_config = routing_config.get("models") or {"default": DEFAULT_MODEL}
+        self.agents_config = routing_config.get("agents") or {}
+        self.hedging_config = routing_config.get("hedging") or {}
+        self.model_factory = model_factory
+        self.tracker = tracker or LatencyTracker(window=self.hedging_config.get("window", 50))
+        # Un par de pools por router: cada crew del pool tiene su propia capacidad
+        max_workers = self.hedging_config.get("max_workers", DEFAULT_MAX_WORKERS)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-router")
+        self.hedge_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-hedge")
+        self._models: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def model(self, name: str) -> Any:
+        """Instancia (cacheada) del modelo configurado con ese nombre."""
+        with self._lock:
+            if name not in self._models:
+                if name not in self.models_config:
+                    raise ValueError(f"Modelo no configurado en model_routing: {name}")
+                self._models[name] = self.model_factory(self.models_config[name])
+            return self._models[name]
+
+    def llm_for(self, agent_name: str) -> HedgedLLM:
+        route = self.agents_config.get(agent_name) or {}
+        primary = route.get("primary") or next(iter(self.models_config))
+        secondary = route.get("secondary")
+        return HedgedLLM(
+            primary=self.model(primary),
+            secondary=self.model(secondary) if secondary else None,
+            tracker=self.tracker,
+            percentile=self.hedging_config.get("percentile", 95),
+            min_samples=self.hedging_config.get("min_samples", 10),
+            initial_hedge_after=self.hedging_config.get("initial_hedge_after"),
+            agent_name=agent_name,
+            executor=self.executor,
+            hedge_executor=self.hedge_executor,
+        )
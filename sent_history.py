@@ -0,0 +1,104 @@
+#sent_history.py
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from dedup import normalize_company_name, normalize_domain
+from utils import logger
+
+DEFAULT_COOLDOWN_DAYS = 90
+DEFAULT_CAMPAIGN = "default"
+
+
+def company_keys(company: Dict[str, Any]) -> List[str]:
+    """Claves normalizadas de una empresa: dominio y/o nombre."""
+    keys = []
+    domain = normalize_domain(company.get("website"))
+    if domain:
+        keys.append(f"domain:{domain}")
+    name = normalize_company_name(company.get("company_name"))
+    if name:
+        keys.append(f"name:{name}")
+    return keys
+
+def profile_key(profile: Dict[str, Any]) -> str:
+    """Clave del perfil de usuario (email, o nombre si no hay email)."""
+    return str(profile.get("email") or profile.get("name") or "anonymous").strip().lower()
+
+def _profile_or_default(profile: Optional[str]) -> str:
+    return profile or profile_key({})
+
+
+class SentHistory:
+    """Índice local (SQLite) de los emails generados por empresa, perfil y campaña."""
+
+    def __init__(self, path: str = "output/sent_history.db", cooldown_days: float = DEFAULT_COOLDOWN_DAYS):
+        self.path = path
+        self.cooldown_seconds = cooldown_days * 86400
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS sent_outreach (
+                    company_key TEXT NOT NULL,
+                    profile_key TEXT NOT NULL,
+                    campaign TEXT NOT NULL,
+                    company_name TEXT,
+                    sent_at REAL NOT NULL,
+                    PRIMARY KEY (company_key, profile_key, campaign)
+                )
+                """
+            )
+
+    def last_sent(self, keys: List[str], profile: Optional[str], campaign: str = DEFAULT_CAMPAIGN) -> Optional[float]:
+        """Timestamp del último email generado para cualquiera de las claves, o None."""
+        if not keys:
+            return None
+        profile = _profile_or_default(profile)
+        placeholders = ", ".join("?" for _ in keys)
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT MAX(sent_at) FROM sent_outreach WHERE company_key IN ({placeholders}) "
+                f"AND profile_key = ? AND campaign = ?",
+                (*keys, profile, campaign),
+            ).fetchone()
+        return row[0] if row else None
+
+    def in_cooldown(self, keys: List[str], profile: Optional[str], campaign: str = DEFAULT_CAMPAIGN,
+                    now: Optional[float] = None) -> bool:
+        sent_at = self.last_sent(keys, profile, campaign)
+        return sent_at is not None and (now or time.time()) - sent_at < self.cooldown_seconds
+
+    def record(self, company: Dict[str, Any], profile: Optional[str], campaign: str = DEFAULT_CAMPAIGN,
+               sent_at: Optional[float] = None) -> None:
+        """Registra que se generó un email para la empresa (una fila por clave)."""
+        sent_at = sent_at or time.time()
+        profile = _profile_or_default(profile)
+        rows = [(key, profile, campaign, company.get("company_name"), sent_at) for key in company_keys(company)]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO sent_outreach (company_key, profile_key, campaign, company_name, sent_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def filter_companies(self, companies: List[Dict[str, Any]], profile: Optional[str],
+                         campaign: str = DEFAULT_CAMPAIGN) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Separa las empresas en (pendientes, contactadas dentro del cooldown)."""
+        now = time.time()
+        pending, deferred = [], []
+        for company in companies:
+            (deferred if self.in_cooldown(company_keys(company), profile, campaign, now) else pending).append(company)
+        if deferred:
+            logger.info(f"{len(deferred)} empresas omitidas por contacto reciente (campaña {campaign})")
+        return pending, deferred
+
+    def filter_urls(self, urls: List[str], profile: Optional[str],
+                    campaign: str = DEFAULT_CAMPAIGN) -> Tuple[List[str], List[str]]:
+        """Igual que filter_companies, pero para las URLs de entrada (por dominio)."""
+        pending, deferred = self.filter_companies([{"website": url} for url in urls], profile, campaign)
+        return [company["website"] for company in pending], [company["website"] for company in deferred]
@@ -0,0 +1,93 @@
+import unittest
+import httpx
+from crawler import SiteCrawler, format_page_bundle
+
+
+def make_crawler(pages, robots=None):
+    """SiteCrawler con un transporte httpx en memoria (sin red)."""
+    requested = []
+
+    def handler(request):
+        url = str(request.url)
+        requested.append(url)
+        if request.url.path == "/robots.txt":
+            return httpx.Response(200, text=robots) if robots else httpx.Response(404)
+        if url in pages:
+            status, body = pages[url]
+            if status in (301, 302):
+                return httpx.Response(status, headers={"location": body})
+            return httpx.Response(status, text=body, headers={"content-type": "text/html"})
+        return httpx.Response(404)
+
+    client = httpx.Client(transport=httpx.MockTransport(handler), follow_redirects=True)
+    return SiteCrawler(client=client, max_workers=2), requested
+
+
+HOME = """<html><body><p>Bienvenidos a Acme</p>
+<a href="https://www.acme.com/contacto">Contacto</a>
+<a href="/nosotros">Quiénes somos</a>
+<a href="https://www.acme.com/blog/post-1">Blog</a>
+<a href="https://otrodominio.com/contact">Contacto externo</a>
+<a href="mailto:info@acme.com">Escribinos</a>
+</body></html>"""
+
+
+class TestSiteCrawler(unittest.TestCase):
+
+    def test_follows_redirect_to_www(self):
+        """Test that same-site links are resolved against the final URL after a redirect."""
+        crawler, requested = make_crawler({
+            "https://acme.com/": (301, "https://www.acme.com/"),
+            "https://www.acme.com/": (200, HOME),
+            "https://www.acme.com/contacto": (200, "<p>Escribinos a ventas@acme.com</p>"),
+            "https://www.acme.com/nosotros": (200, "<p>Somos un equipo de 10 personas</p>"),
+        })
+        pages = crawler.crawl("https://acme.com/")
+        self.assertEqual(list(pages), [
+            "https://www.acme.com/", "https://www.acme.com/contacto", "https://www.acme.com/nosotros",
+        ])
+        self.assertNotIn("https://www.acme.com/blog/post-1", requested)
+        self.assertNotIn("https://otrodominio.com/contact", requested)
+
+    def test_respects_robots_of_final_host(self):
+        """Test that robots.txt of the redirected host is honoured."""
+        crawler, requested = make_crawler({
+            "https://acme.com/": (301, "https://www.acme.com/"),
+            "https://www.acme.com/": (200, HOME),
+            "https://www.acme.com/contacto": (200, "<p>ventas@acme.com</p>"),
+            "https://www.acme.com/nosotros": (200, "<p>Nosotros</p>"),
+        }, robots="User-agent: *\nDisallow: /contacto")
+        pages = crawler.crawl("https://acme.com/")
+        self.assertIn("https://www.acme.com/nosotros", pages)
+        self.assertNotIn("https://www.acme.com/contacto", pages)
+        self.assertNotIn("https://www.acme.com/contacto", requested)
+
+    def test_drops_links_redirected_off_site(self):
+        """Test that a same-site link redirecting to another host is not included."""
+        crawler, _ = make_crawler({
+            "https://www.acme.com/": (200, HOME),
+            "https://www.acme.com/contacto": (302, "https://formularios.com/acme"),
+            "https://formularios.com/acme": (200, "<p>Formulario de otra empresa: ventas@formularios.com</p>"),
+            "https://www.acme.com/nosotros": (200, "<p>Nosotros</p>"),
+        })
+        pages = crawler.crawl("https://www.acme.com/")
+        self.assertEqual(list(pages), ["https://www.acme.com/", "https://www.acme.com/nosotros"])
+
+    def test_unreachable_site(self):
+        """Test that an HTTP error on the start page yields no pages."""
+        crawler, _ = make_crawler({"https://acme.com/": (500, "error")})
+        self.assertEqual(crawler.crawl("https://acme.com/"), {})
+
+    def test_page_bundle_format(self):
+        """Test that emails are listed first and each page gets its own section."""
+        bundle = format_page_bundle({
+            "https://www.acme.com/": "Bienvenidos",
+            "https://www.acme.com/contacto": "ventas@acme.com o info@acme.com",
+        })
+        self.assertTrue(bundle.startswith("Emails encontrados: info@acme.com, ventas@acme.com\n\n"))
+        self.assertIn("## https://www.acme.com/contacto\nventas@acme.com o info@acme.com", bundle)
+        self.assertEqual(format_page_bundle({}), "No se pudo obtener contenido del sitio.")
+
+
+if __name__ == '__main__':
+    unittest.main()
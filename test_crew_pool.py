@@ -0,0 +1,130 @@
+import datetime
+import threading
+import unittest
+from unittest.mock import patch
+from crew_pool import CrewPool
+from crew import LeadGenerationCrew
+
+
+class FakeCrew:
+    """Crew local: registra los inputs de cada ejecución."""
+
+    created = 0
+
+    def __init__(self, stale=False):
+        FakeCrew.created += 1
+        self.stale = stale
+        self.runs = []
+
+    def is_stale(self):
+        return self.stale
+
+    def run(self, inputs):
+        self.runs.append(inputs)
+        return {"status": "success", "crew": id(self)}
+
+
+class TestCrewPool(unittest.TestCase):
+
+    def setUp(self):
+        FakeCrew.created = 0
+
+    def test_reuses_instances(self):
+        """Test that sequential runs reuse the same pre-built instance."""
+        pool = CrewPool(size=2, factory=FakeCrew)
+        first = pool.run({"company_urls": ["https://acme.com"]})
+        second = pool.run({"company_urls": ["https://beta.com"]})
+        self.assertEqual(first["crew"], second["crew"])
+        self.assertEqual(FakeCrew.created, 2)
+
+    def test_lazy_creation_up_to_size(self):
+        """Test that without prewarm instances are created on demand, never above size."""
+        pool = CrewPool(size=2, factory=FakeCrew, prewarm=False)
+        first, second = pool.acquire(), pool.acquire()
+        self.assertIsNot(first, second)
+        with self.assertRaises(TimeoutError):
+            pool.acquire(timeout=0.05)
+        self.assertEqual(FakeCrew.created, 2)
+        pool.release(first)
+        self.assertIs(pool.acquire(timeout=0.05), first)
+
+    def test_waiting_caller_gets_released_instance(self):
+        """Test that a blocked caller receives the instance as soon as it is released."""
+        pool = CrewPool(size=1, factory=FakeCrew)
+        busy = pool.acquire()
+        threading.Timer(0.05, pool.release, args=[busy]).start()
+        self.assertIs(pool.acquire(timeout=1), busy)
+
+    def test_stale_instance_is_rebuilt(self):
+        """Test that an instance built from an outdated config is replaced on acquire."""
+        pool = CrewPool(size=1, factory=FakeCrew)
+        stale = pool.acquire()
+        stale.stale = True
+        pool.release(stale)
+        fresh = pool.acquire()
+        self.assertIsNot(fresh, stale)
+        self.assertEqual(FakeCrew.created, 2)
+
+    def test_factory_error_frees_slot(self):
+        """Test that a failed build does not consume a pool slot."""
+        calls = []
+
+        def factory():
+            calls.append(1)
+            if len(calls) == 1:
+                raise RuntimeError("boom")
+            return FakeCrew()
+
+        pool = CrewPool(size=1, factory=factory, prewarm=False)
+        with self.assertRaises(RuntimeError):
+            pool.acquire()
+        self.assertIsInstance(pool.acquire(timeout=0.05), FakeCrew)
+
+
+class TestCrewReset(unittest.TestCase):
+
+    @patch("crew.SentHistory")
+    def test_reset_refreshes_report_date(self, _):
+        """Test that a pooled crew gets a new report date/timestamp on each run."""
+        crew_instance = LeadGenerationCrew()
+        with patch("crew.datetime") as mock_datetime:
+            mock_datetime.datetime.now.return_value = datetime.datetime(2026, 1, 1, 9, 0, 0)
+            first = crew_instance.reset({"email": "yo@example.com"})
+            mock_datetime.datetime.now.return_value = datetime.datetime(2026, 1, 2, 10, 30, 0)
+            second = crew_instance.reset({"email": "yo@example.com"})
+        self.assertEqual((first["report_date"], first["report_timestamp"]), ("2026-01-01", "2026-01-01 09:00:00"))
+        self.assertEqual((second["report_date"], second["report_timestamp"]), ("2026-01-02", "2026-01-02 10:30:00"))
+        self.assertEqual(crew_instance.reporting_analyst.report_inputs["report_date"], "2026-01-02")
+
+    @patch("crew.LeadGenerationCrew._export_leads")
+    @patch("crew.SentHistory")
+    def test_runs_do_not_share_tool_cache_or_token_usage(self, *_):
+        """Test that a pooled crew starts each run with an empty tool cache and zeroed token counters."""
+        crew_instance = LeadGenerationCrew()
+        cached = []
+
+        def fake_kickoff(inputs):
+            cache = crew_instance.crew._cache_handler
+            cached.append(cache.read("site_crawler", inputs["url"]))
+            cache.add("site_crawler", inputs["url"], f"páginas de la ejecución {len(cached)}")
+            crew_instance.business_researcher._token_process.sum_prompt_tokens(100)
+            return crew_instance.crew.calculate_usage_metrics()
+
+        with patch("crew.Crew.kickoff", side_effect=fake_kickoff):
+            first = crew_instance.run({"url": "https://acme.com", "email": "yo@example.com"})
+            second = crew_instance.run({"url": "https://acme.com", "email": "yo@example.com"})
+        self.assertEqual(cached, [None, None])
+        self.assertEqual((first.total_tokens, second.total_tokens), (100, 100))
+
+    @patch("crew.SentHistory")
+    def test_is_stale_after_config_edit(self, _):
+        """Test that a crew detects edits to its YAML configuration."""
+        crew_instance = LeadGenerationCrew()
+        self.assertFalse(crew_instance.is_stale())
+        edited = {**crew_instance.tasks_config, "nueva_tarea": {"description": "..."}}
+        with patch("crew.load_yaml_config", side_effect=lambda path: edited if "tasks" in path else crew_instance.agents_config):
+            self.assertTrue(crew_instance.is_stale())
+
+
+if __name__ == '__main__':
+    unittest.main()
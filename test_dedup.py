@@ -0,0 +1,107 @@
+import time
+import unittest
+from dedup import (
+    normalize_company_name,
+    normalize_domain,
+    cluster_companies,
+    deduplicate_companies,
+    deduplicate_urls,
+    MinHashLSH,
+)
+
+
+class TestNormalization(unittest.TestCase):
+
+    def test_company_name_strips_suffixes_and_accents(self):
+        """Test that legal suffixes, punctuation and accents are removed."""
+        self.assertEqual(normalize_company_name("Consultora Ñandú S.R.L."), "consultora nandu")
+        self.assertEqual(normalize_company_name("ACME, Inc."), "acme")
+        self.assertEqual(normalize_company_name(None), "")
+
+    def test_domain(self):
+        """Test domain normalization and aggregator filtering."""
+        self.assertEqual(normalize_domain("https://www.Acme.com.ar/contacto"), "acme.com.ar")
+        self.assertEqual(normalize_domain("acme.com.ar"), "acme.com.ar")
+        self.assertIsNone(normalize_domain("https://facebook.com/acme"))
+        self.assertIsNone(normalize_domain(None))
+
+
+class TestEntityResolution(unittest.TestCase):
+
+    def setUp(self):
+        self.records = [
+            {"company_name": "Acme S.A.", "website": "https://www.acme.com.ar", "about": "Software a medida para pymes"},
+            {"company_name": "Beta Logística", "website": "https://beta.com", "about": "Transporte de cargas"},
+            {"company_name": "ACME", "website": None, "email": "info@acme.com.ar"},
+            {"company_name": "Otra Empresa", "website": "acme.com.ar/nosotros"},
+        ]
+
+    def test_cluster_companies(self):
+        """Test that records sharing a name or domain end up in the same cluster."""
+        clusters = sorted(sorted(cluster) for cluster in cluster_companies(self.records))
+        self.assertEqual(clusters, [[0, 2, 3], [1]])
+
+    def test_deduplicate_merges_missing_fields(self):
+        """Test that the canonical record is completed with fields from its duplicates."""
+        result = deduplicate_companies(self.records)
+        self.assertEqual(len(result), 2)
+        self.assertEqual(result[0]["company_name"], "Acme S.A.")
+        self.assertEqual(result[0]["email"], "info@acme.com.ar")
+
+    def test_near_duplicate_names(self):
+        """Test MinHash matching of slightly different names and descriptions."""
+        records = [
+            {"company_name": "Estudio Contable Martinez", "about": "asesoramiento contable e impositivo para empresas"},
+            {"company_name": "Estudio Contable Martínez Hnos", "about": "asesoramiento contable e impositivo para empresas y particulares"},
+            {"company_name": "Panadería La Espiga", "about": "panificados artesanales"},
+        ]
+        self.assertEqual(len(deduplicate_companies(records)), 2)
+
+    def test_records_without_shingles_are_not_merged(self):
+        """Test that names reduced to nothing by normalization do not collide in LSH."""
+        records = [{"company_name": "S.A."}, {"company_name": "Inc."}, {"company_name": "Acme"}]
+        self.assertEqual(sorted(cluster_companies(records)), [[0], [1], [2]])
+
+    def test_lsh_returns_every_bucket_member(self):
+        """Test that candidates include all records sharing a band, not only the first one."""
+        lsh = MinHashLSH(num_perm=8, bands=2)
+        signature = lsh.signature({"n:acm", "n:cme"})
+        lsh.insert(0, signature)
+        lsh.insert(1, signature)
+        self.assertEqual(lsh.insert(2, signature), [0, 1])
+
+    def test_same_name_different_domains(self):
+        """Test that records sharing a name but with different websites stay apart."""
+        records = [
+            {"company_name": "Servicios S.A.", "website": "https://serviciosnorte.com.ar"},
+            {"company_name": "Servicios SRL", "website": "https://servsur.com"},
+            {"company_name": "Servicios", "email": "info@servsur.com"},
+        ]
+        clusters = sorted(sorted(cluster) for cluster in cluster_companies(records))
+        self.assertEqual(len(clusters), 2)
+        self.assertNotIn([0, 1], clusters)
+
+    def test_shared_description_scales_linearly(self):
+        """Test that directory-style batches with a shared description do not go quadratic."""
+        def batch(size):
+            return [{"company_name": f"Comercio {i} {i * 7919 % 10007}",
+                     "about": "empresa listada en la guía comercial de la provincia"} for i in range(size)]
+
+        timings = []
+        for size in (2000, 8000):
+            records = batch(size)
+            start = time.perf_counter()
+            cluster_companies(records)
+            timings.append(time.perf_counter() - start)
+        self.assertLess(timings[1], timings[0] * 8)  # 4x registros: lineal ~4x, cuadrático ~16x
+
+    def test_deduplicate_urls(self):
+        """Test that only repeated URLs are dropped, not other pages of the same site."""
+        urls = ["https://acme.com.ar", "http://www.acme.com.ar/", "https://acme.com.ar/contacto", "https://beta.com"]
+        self.assertEqual(deduplicate_urls(urls), ["https://acme.com.ar", "https://acme.com.ar/contacto", "https://beta.com"])
+        directory = ["https://directorio.com/software", "https://directorio.com/consultoras", "https://directorio.com/software/"]
+        self.assertEqual(deduplicate_urls(directory), directory[:2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import json
+import os
+import tempfile
+import unittest
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from exporters import (
+    JsonlLeadSink,
+    ParquetLeadSink,
+    compact_parquet,
+    export_leads,
+    get_lead_sinks,
+    close_lead_sinks,
+    lead_record,
+)
+from utils import CompanyData, EmailData
+
+
+def make_record(index):
+    company = CompanyData(company_name=f"Empresa {index}", industry="Software", province="Córdoba",
+                          website=f"https://empresa{index}.com", source="test", fecha_consulta="2026-01-01")
+    email = EmailData(email_subject="Hola", email_body="...", keywords=["ia", "datos"], generated_at="2026-01-01")
+    return lead_record(company, email)
+
+
+class TestLeadSinks(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.tmp.name, "leads")
+
+    def tearDown(self):
+        close_lead_sinks()
+        self.tmp.cleanup()
+
+    def test_parquet_dataset_round_trip(self):
+        """Test that the written files read back as one dataset with the lead schema."""
+        sink = ParquetLeadSink(self.directory, row_group_size=4)
+        for index in range(10):
+            sink.write(make_record(index))
+        sink.close()
+        table = ds.dataset(self.directory, format="parquet").to_table()
+        self.assertEqual(table.num_rows, 10)
+        self.assertEqual(sorted(table.column("company_name").to_pylist()), sorted(f"Empresa {i}" for i in range(10)))
+        self.assertEqual(table.column("email_keywords").to_pylist()[0], ["ia", "datos"])
+        self.assertEqual(table.column("website").to_pylist()[0], "https://empresa0.com/")
+
+    def test_each_run_is_flushed(self):
+        """Test that every run reaches Parquet right away, without waiting for the buffer or the process exit."""
+        output_dir = self.tmp.name
+        for run in range(3):
+            export_leads([make_record(run * 2), make_record(run * 2 + 1)], output_dir)
+            self.assertEqual(ds.dataset(self.directory, format="parquet").count_rows(), (run + 1) * 2)
+        self.assertEqual(len(os.listdir(self.directory)), 3)
+        export_leads([], output_dir)
+        self.assertEqual(len(os.listdir(self.directory)), 3)  # Una ejecución sin leads no deja archivo
+        with open(os.path.join(output_dir, "leads.jsonl"), encoding="utf-8") as f:
+            self.assertEqual(len(f.readlines()), 6)
+
+    def test_compacts_small_run_files(self):
+        """Test that the per-run files are merged every compact_every files."""
+        sink = ParquetLeadSink(self.directory, row_group_size=100, compact_every=3)
+        for index in range(4):
+            sink.write(make_record(index))
+            sink.flush()
+        self.assertEqual(len(os.listdir(self.directory)), 2)  # Tres compactados + el de la última ejecución
+        self.assertEqual(ds.dataset(self.directory, format="parquet").count_rows(), 4)
+
+    def test_flush_by_row_count(self):
+        """Test that a full file is written each time the buffer reaches rows_per_file."""
+        sink = ParquetLeadSink(self.directory, row_group_size=2, rows_per_file=4)
+        for index in range(9):
+            sink.write(make_record(index))
+        self.assertEqual(len(os.listdir(self.directory)), 2)
+        metadata = pq.ParquetFile(os.path.join(self.directory, sorted(os.listdir(self.directory))[0])).metadata
+        self.assertEqual((metadata.num_rows, metadata.num_row_groups), (4, 2))
+        sink.close()
+        self.assertEqual(ds.dataset(self.directory, format="parquet").count_rows(), 9)
+
+    def test_compaction(self):
+        """Test that small files are merged into one without losing rows."""
+        for index in range(3):
+            sink = ParquetLeadSink(self.directory, row_group_size=100)
+            sink.write(make_record(index))
+            sink.close()
+        self.assertEqual(len(os.listdir(self.directory)), 3)
+        compacted = compact_parquet(self.directory, row_group_size=100)
+        self.assertEqual(os.listdir(self.directory), [os.path.basename(compacted)])
+        self.assertEqual(ds.dataset(self.directory, format="parquet").count_rows(), 3)
+
+    def test_shared_sinks_per_directory(self):
+        """Test that the same sinks are reused for the same output directory."""
+        sinks = get_lead_sinks(self.tmp.name)
+        self.assertIs(get_lead_sinks(self.tmp.name), sinks)
+        self.assertIsInstance(sinks[0], JsonlLeadSink)
+
+    def test_jsonl_append(self):
+        """Test that the JSONL sink appends one line per lead."""
+        path = os.path.join(self.tmp.name, "leads.jsonl")
+        for index in range(2):
+            sink = JsonlLeadSink(path)
+            sink.write(make_record(index))
+            sink.close()
+        with open(path, encoding="utf-8") as f:
+            self.assertEqual([json.loads(line)["company_name"] for line in f], ["Empresa 0", "Empresa 1"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+from utils import FileCache
+
+
+class TestFileCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "config.yaml")
+        self.write("a: 1")
+        self.cache = FileCache()
+        self.loader = MagicMock(side_effect=lambda text: {"text": text, "items": [1]})
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, text, mtime_ns=None):
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(text)
+        if mtime_ns is not None:
+            os.utime(self.path, ns=(mtime_ns, mtime_ns))
+
+    def test_unchanged_file_is_not_reparsed(self):
+        """Test that an unchanged file does not call the loader again."""
+        self.cache.get(self.path, self.loader)
+        self.assertEqual(self.cache.get(self.path, self.loader)["text"], "a: 1")
+        self.assertEqual(self.loader.call_count, 1)
+
+    def test_edit_reloads(self):
+        """Test that editing the file reloads it."""
+        self.write("a: 1", mtime_ns=1_000_000_000)
+        self.cache.get(self.path, self.loader)
+        self.write("a: 2", mtime_ns=2_000_000_000)
+        self.assertEqual(self.cache.get(self.path, self.loader)["text"], "a: 2")
+        self.assertEqual(self.loader.call_count, 2)
+
+    def test_touch_with_same_content_reuses_value(self):
+        """Test that an mtime-only change with the same hash reuses the cached value."""
+        self.write("a: 1", mtime_ns=1_000_000_000)
+        self.cache.get(self.path, self.loader)
+        os.utime(self.path, ns=(3_000_000_000, 3_000_000_000))
+        self.assertEqual(self.cache.get(self.path, self.loader)["text"], "a: 1")
+        self.assertEqual(self.loader.call_count, 1)
+
+    def test_returns_independent_copies(self):
+        """Test that callers can mutate their copy without affecting the cache."""
+        first = self.cache.get(self.path, self.loader)
+        first["items"].append(2)
+        self.assertEqual(self.cache.get(self.path, self.loader)["items"], [1])
+
+    def test_invalidate(self):
+        """Test that an invalidated entry is parsed again."""
+        self.cache.get(self.path, self.loader)
+        self.cache.invalidate(self.path)
+        self.cache.get(self.path, self.loader)
+        self.assertEqual(self.loader.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+from unittest.mock import patch
+from memory_policy import BoundedMemoryStorage, BoundedLongTermStorage, MemoryPolicy
+
+
+class TestBoundedMemoryStorage(unittest.TestCase):
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted when the entry budget is exceeded."""
+        storage = BoundedMemoryStorage(max_entries=2, ttl_seconds=None)
+        storage.save("acme software", {})
+        storage.save("beta logistica", {})
+        self.assertEqual(len(storage.search("acme")), 1)  # Acme pasa a ser la más reciente
+        storage.save("gamma consultora", {})
+        self.assertEqual(storage.search("beta"), [])
+        self.assertEqual(len(storage.search("acme")), 1)
+        self.assertEqual(storage.stats()["evictions"], 1)
+
+    def test_ttl_eviction(self):
+        """Test that entries older than the TTL are dropped."""
+        storage = BoundedMemoryStorage(ttl_seconds=60)
+        with patch("memory_policy.time.monotonic", return_value=1000.0):
+            storage.save("acme software", {})
+        with patch("memory_policy.time.monotonic", return_value=1030.0):
+            self.assertEqual(len(storage.search("acme")), 1)
+        with patch("memory_policy.time.monotonic", return_value=1061.0):
+            self.assertEqual(storage.search("acme"), [])
+            self.assertEqual(storage.stats()["entries"], 0)
+
+    def test_byte_budget(self):
+        """Test that the byte budget is enforced on save."""
+        storage = BoundedMemoryStorage(max_entries=100, max_bytes=50, ttl_seconds=None)
+        for index in range(5):
+            storage.save(f"entrada{index} " + "x" * 10, {})  # 21 bytes por entrada
+        stats = storage.stats()
+        self.assertEqual(stats["entries"], 2)
+        self.assertLessEqual(stats["bytes"], 50)
+        self.assertEqual(stats["evictions"], 3)
+        self.assertEqual(len(storage.search("entrada4")), 1)  # La más nueva se conserva
+
+    def test_long_term_load(self):
+        """Test the long term save/load interface used by CrewAI."""
+        storage = BoundedLongTermStorage(ttl_seconds=None)
+        storage.save("tarea", {"quality": 7}, "2026-01-01", 7)
+        storage.save("tarea", {"quality": 9}, "2026-01-02", 9)
+        self.assertEqual([item["score"] for item in storage.load("tarea", 1)], [9])
+
+
+class TestMemoryPolicy(unittest.TestCase):
+
+    def test_run_scope(self):
+        """Test that start_run clears run-scoped memories but keeps long term memory."""
+        policy = MemoryPolicy({"enabled": True, "scope": "run"})
+        policy.short_term.save("acme software", {})
+        policy.entities.save("acme", {})
+        policy.long_term.save("tarea", {}, "2026-01-01", 8)
+        policy.start_run()
+        stats = policy.stats()
+        self.assertEqual(stats["short_term"]["entries"], 0)
+        self.assertEqual(stats["entities"]["entries"], 0)
+        self.assertEqual(stats["long_term"]["entries"], 1)
+
+    def test_worker_scope(self):
+        """Test that worker-scoped memories survive between runs."""
+        policy = MemoryPolicy({"enabled": True, "scope": "worker"})
+        policy.short_term.save("acme software", {})
+        policy.start_run()
+        self.assertEqual(policy.stats()["short_term"]["entries"], 1)
+
+    def test_disabled_by_default(self):
+        """Test that crew memory stays off unless enabled (it adds an LLM call per task)."""
+        self.assertEqual(MemoryPolicy().crew_kwargs(), {"memory": False})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import unittest
+from unittest.mock import MagicMock
+from parsing import (
+    extract_json_objects,
+    JsonStreamExtractor,
+    split_json_and_text,
+    parse_company_records,
+    split_company_output,
+    complete_company_records,
+    format_company_output,
+    parse_email_records,
+    missing_fields,
+)
+from utils import CompanyData
+
+
+class TestJsonExtraction(unittest.TestCase):
+
+    def test_fenced_json_in_prose(self):
+        """Test extraction of a fenced JSON array surrounded by prose."""
+        text = 'Here are the companies:\n```json\n[{"name": "Acme"}, {"name": "Beta"}]\n```\nDone.'
+        self.assertEqual(extract_json_objects(text), [{"name": "Acme"}, {"name": "Beta"}])
+
+    def test_repairs_common_defects(self):
+        """Test repair of trailing commas, single quotes and Python literals."""
+        text = "Result: {'name': 'Acme', 'active': True, 'tags': ['a', 'b',],}"
+        self.assertEqual(extract_json_objects(text), [{"name": "Acme", "active": True, "tags": ["a", "b"]}])
+
+    def test_apostrophes_in_prose(self):
+        """Test that apostrophes inside bracketed prose do not swallow the JSON that follows."""
+        text = "See [Acme's site](https://acme.com) for details.\n```json\n[{\"name\": \"Acme\"}]\n```"
+        values, prose = split_json_and_text(text)
+        self.assertEqual(values, [[{"name": "Acme"}]])
+        self.assertEqual(prose, "See [Acme's site](https://acme.com) for details.")
+        text = 'Results [it\'s a short list]:\n{"name": "Acme"} And {"name": "Beta"}'
+        self.assertEqual(extract_json_objects(text), [{"name": "Acme"}, {"name": "Beta"}])
+
+    def test_markdown_links_stay_in_prose(self):
+        """Test that bracketed prose that is not JSON is kept and scanning resumes after it."""
+        values, prose = split_json_and_text("Escribí a [Contacto](https://acme.com/contacto) [ver {'name': 'Acme'}]")
+        self.assertEqual(values, [{"name": "Acme"}])
+        self.assertEqual(prose, "Escribí a [Contacto](https://acme.com/contacto) [ver ]")
+
+    def test_streaming_chunks(self):
+        """Test that objects split across chunks are emitted once complete."""
+        extractor = JsonStreamExtractor()
+        self.assertEqual(extractor.feed('texto {"name": "Ac'), [])
+        self.assertEqual(extractor.feed('me", "about": "a {b}"} y {"x": 1}'), [{"name": "Acme", "about": "a {b}"}, {"x": 1}])
+
+
+class TestRecordParsing(unittest.TestCase):
+
+    def test_company_field_mapping(self):
+        """Test alias mapping, nested contact data and defaults."""
+        output = MagicMock(json_dict=None, raw='''```json
+        [{"Company Name": "Acme", "Industria": "Software", "Provincia": "Córdoba",
+          "Website URL": "https://acme.com.ar",
+          "Contact Information": {"emails": ["info@acme.com.ar"], "social_media": ["https://instagram.com/acme"]}}]
+        ```''')
+        records = parse_company_records(output)
+        self.assertEqual(len(records), 1)
+        record = records[0]
+        self.assertEqual(record["company_name"], "Acme")
+        self.assertEqual(record["email"], "info@acme.com.ar")
+        self.assertEqual(record["instagram"], "https://instagram.com/acme")
+        self.assertEqual(missing_fields(record, CompanyData), [])
+
+    def test_reprompts_only_missing_fields(self):
+        """Test that the LLM is asked only for the missing required fields."""
+        llm = MagicMock()
+        llm.call.return_value = '{"industry": "Logística", "province": "Mendoza"}'
+        records = parse_company_records('{"name": "Beta", "email": "not-an-email"}', llm=llm)
+        prompt = llm.call.call_args[0][0]
+        self.assertIn("industry, province", prompt)
+        self.assertNotIn("company_name,", prompt)
+        self.assertEqual(records[0]["industry"], "Logística")
+        self.assertIsNone(records[0]["email"])  # Opcional inválido descartado
+        self.assertEqual(missing_fields(records[0], CompanyData), [])
+
+    def test_rewrite_keeps_prose_and_unnamed_objects(self):
+        """Test that rewriting the research output only drops the records left out."""
+        raw = 'Encontré dos empresas:\n```json\n[{"name": "Acme"}, {"name": "Beta"}, {"note": "sin nombre"}]\n```\nFuente: directorio.'
+        records, others, prose = split_company_output(raw)
+        self.assertEqual([record["company_name"] for record in records], ["Acme", "Beta"])
+        self.assertEqual(others, [{"note": "sin nombre"}])
+        rewritten = format_company_output(records[:1], others, prose)
+        self.assertIn("Encontré dos empresas:", rewritten)
+        self.assertIn("Fuente: directorio.", rewritten)
+        self.assertEqual(extract_json_objects(rewritten), [records[0], {"note": "sin nombre"}])
+
+    def test_complete_company_records(self):
+        """Test that only incomplete records trigger a re-prompt."""
+        llm = MagicMock()
+        llm.call.return_value = '{"industry": "Software", "province": "Córdoba"}'
+        records, _, _ = split_company_output('[{"name": "Acme"}, {"name": "Beta", "industry": "Logística", "province": "Mendoza"}]')
+        completed = complete_company_records(records, llm, "Acme es una empresa de software de Córdoba")
+        self.assertEqual(llm.call.call_count, 1)
+        self.assertEqual([missing_fields(record, CompanyData) for record in completed], [[], []])
+
+    def test_plain_text_email(self):
+        """Test subject/body split of a plain text email."""
+        records = parse_email_records("**Subject:** Automatización para Acme\n\nHola equipo de Acme,\n...")
+        self.assertEqual(records[0]["email_subject"], "Automatización para Acme")
+        self.assertTrue(records[0]["email_body"].startswith("Hola equipo"))
+        self.assertEqual(records[0]["keywords"], [])
+
+    def test_address_is_not_an_email_body(self):
+        """Test that a JSON object with only an email address is not taken as an email."""
+        self.assertEqual(parse_email_records('{"company_name": "Acme", "email": "info@acme.com"}'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import time
+import unittest
+from router import LatencyTracker, ModelRouter
+
+
+class StubModel:
+    """Modelo local que responde tras `delay` segundos (o lanza `error`)."""
+
+    def __init__(self, model, delay=0.0, error=None):
+        self.model = model
+        self.delay = delay
+        self.error = error
+        self.stop = None
+        self.calls = 0
+
+    def call(self, messages, **kwargs):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return f"{self.model}: {messages}"
+
+
+def make_router(stubs, agents, hedging=None):
+    config = {
+        "models": {name: {"model": name} for name in stubs},
+        "agents": agents,
+        "hedging": hedging or {},
+    }
+    return ModelRouter(config, model_factory=lambda model_config: stubs[model_config["model"]])
+
+
+class TestLatencyTracker(unittest.TestCase):
+
+    def test_percentile(self):
+        """Test rolling window percentile calculation."""
+        tracker = LatencyTracker(window=5)
+        for seconds in [10, 1, 2, 3, 4, 5]:
+            tracker.record("m", seconds)
+        self.assertEqual(tracker.count("m"), 5)  # El 10 salió de la ventana
+        self.assertEqual(tracker.percentile("m", 100), 5)
+        self.assertEqual(tracker.percentile("m", 50), 3)
+        self.assertIsNone(tracker.percentile("otro", 95))
+
+
+class TestModelRouter(unittest.TestCase):
+
+    def test_routes_per_agent(self):
+        """Test that each agent gets its configured primary model."""
+        stubs = {"fast": StubModel("fast"), "quality": StubModel("quality")}
+        router = make_router(stubs, {"researcher": {"primary": "fast"}, "sales_copywriter": {"primary": "quality"}})
+        self.assertEqual(router.llm_for("researcher").call("hola"), "fast: hola")
+        self.assertEqual(router.llm_for("sales_copywriter").call("hola"), "quality: hola")
+        self.assertIs(router.model("fast"), stubs["fast"])  # Instancias cacheadas
+
+    def test_hedges_slow_primary(self):
+        """Test that a slow primary is hedged and the faster secondary answer wins."""
+        stubs = {"slow": StubModel("slow", delay=1.0), "backup": StubModel("backup")}
+        router = make_router(stubs, {"researcher": {"primary": "slow", "secondary": "backup"}},
+                             hedging={"initial_hedge_after": 0.05})
+        start = time.monotonic()
+        self.assertEqual(router.llm_for("researcher").call("hola"), "backup: hola")
+        self.assertLess(time.monotonic() - start, 0.5)
+
+    def test_hedge_threshold_uses_percentile(self):
+        """Test that once enough samples exist the threshold comes from the latency percentile."""
+        stubs = {"fast": StubModel("fast"), "backup": StubModel("backup")}
+        router = make_router(stubs, {"researcher": {"primary": "fast", "secondary": "backup"}},
+                             hedging={"min_samples": 3, "percentile": 100})
+        for seconds in [0.1, 0.2, 0.3]:
+            router.tracker.record("researcher:fast", seconds)
+        llm = router.llm_for("researcher")
+        self.assertEqual(llm.hedge_after(), 0.3)
+        self.assertEqual(llm.call("hola"), "fast: hola")
+        self.assertEqual(stubs["backup"].calls, 0)
+
+    def test_latency_tracked_per_agent(self):
+        """Test that agents sharing a model keep separate latency windows."""
+        stubs = {"fast": StubModel("fast"), "backup": StubModel("backup")}
+        router = make_router(stubs, {"researcher": {"primary": "fast", "secondary": "backup"},
+                                     "reporting_analyst": {"primary": "fast", "secondary": "backup"}},
+                             hedging={"min_samples": 1, "percentile": 100})
+        router.tracker.record("researcher:fast", 5.0)
+        router.tracker.record("reporting_analyst:fast", 0.5)
+        self.assertEqual(router.llm_for("researcher").hedge_after(), 5.0)
+        self.assertEqual(router.llm_for("reporting_analyst").hedge_after(), 0.5)
+
+    def test_hedge_not_queued_behind_stragglers(self):
+        """Test that slow primaries still running do not delay the hedge request."""
+        stubs = {"slow": StubModel("slow", delay=1.0), "backup": StubModel("backup")}
+        router = make_router(stubs, {"researcher": {"primary": "slow", "secondary": "backup"}},
+                             hedging={"initial_hedge_after": 0.05, "max_workers": 1})
+        llm = router.llm_for("researcher")
+        self.assertEqual(llm.call("uno"), "backup: uno")  # El primario sigue ocupando su único hilo
+        start = time.monotonic()
+        self.assertEqual(llm.call("dos"), "backup: dos")
+        self.assertLess(time.monotonic() - start, 0.5)
+
+    def test_falls_back_on_primary_error(self):
+        """Test that a failing primary falls back to the secondary model."""
+        stubs = {"broken": StubModel("broken", error=RuntimeError("boom")), "backup": StubModel("backup")}
+        router = make_router(stubs, {"researcher": {"primary": "broken", "secondary": "backup"}})
+        self.assertEqual(router.llm_for("researcher").call("hola"), "backup: hola")
+
+    def test_error_without_secondary(self):
+        """Test that errors propagate when there is no secondary model."""
+        stubs = {"broken": StubModel("broken", error=RuntimeError("boom"))}
+        router = make_router(stubs, {"researcher": {"primary": "broken"}})
+        with self.assertRaises(RuntimeError):
+            router.llm_for("researcher").call("hola")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+from crewai import Crew
+from crewai.tasks.task_output import TaskOutput
+from crew import LeadGenerationCrew
+from sent_history import SentHistory, company_keys, profile_key
+
+
+class TestSentHistory(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.history = SentHistory(os.path.join(self.tmp.name, "sent_history.db"), cooldown_days=30)
+        self.acme = {"company_name": "Acme S.A.", "website": "https://www.acme.com.ar"}
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_company_keys(self):
+        """Test that companies are keyed by normalized domain and name."""
+        self.assertEqual(company_keys(self.acme), ["domain:acme.com.ar", "name:acme"])
+        self.assertEqual(company_keys({"company_name": "S.A.", "website": "https://facebook.com/x"}), [])
+
+    def test_filter_after_record(self):
+        """Test that a recorded company is deferred for the same profile and campaign only."""
+        self.history.record(self.acme, "yo@example.com")
+        companies = [{"company_name": "ACME"}, {"company_name": "Beta", "website": "beta.com"}]
+        pending, deferred = self.history.filter_companies(companies, "yo@example.com")
+        self.assertEqual([c["company_name"] for c in deferred], ["ACME"])
+        self.assertEqual([c["company_name"] for c in pending], ["Beta"])
+        self.assertEqual(self.history.filter_companies(companies, "otro@example.com")[1], [])
+        self.assertEqual(self.history.filter_companies(companies, "yo@example.com", "otra-campaña")[1], [])
+
+    def test_cooldown_expiry(self):
+        """Test that a company is eligible again once the cooldown has passed."""
+        keys = company_keys(self.acme)
+        self.history.record(self.acme, "yo@example.com", sent_at=time.time() - 31 * 86400)
+        self.assertFalse(self.history.in_cooldown(keys, "yo@example.com"))
+        self.history.record(self.acme, "yo@example.com", sent_at=time.time() - 29 * 86400)
+        self.assertTrue(self.history.in_cooldown(keys, "yo@example.com"))
+
+    def test_filter_urls(self):
+        """Test URL filtering by domain."""
+        self.history.record(self.acme, "yo@example.com")
+        pending, deferred = self.history.filter_urls(["http://acme.com.ar/contacto", "https://beta.com"], "yo@example.com")
+        self.assertEqual((pending, deferred), (["https://beta.com"], ["http://acme.com.ar/contacto"]))
+
+    def test_record_without_profile(self):
+        """Test that a missing profile falls back to the default profile key."""
+        self.history.record(self.acme, None)
+        self.assertTrue(self.history.in_cooldown(company_keys(self.acme), profile_key({})))
+        self.assertTrue(self.history.in_cooldown(company_keys(self.acme), None))
+
+
+RESEARCH_OUTPUT = 'Encontré una empresa en el directorio:\n[{"name": "Acme S.A.", "website": "https://acme.com.ar", "industry": "Software", "province": "Córdoba"}]'
+EMAIL_OUTPUT = "Subject: Automatización para Acme\n\nHola equipo de Acme, ..."
+
+
+class TestCrewSkipsContactedCompanies(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        history = SentHistory(os.path.join(self.tmp.name, "sent_history.db"))
+        self.crew = LeadGenerationCrew(sent_history=history)
+        self.crew.parser_llm = MagicMock()
+        self.kickoffs = 0
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def fake_kickoff(self, inputs, research_output=RESEARCH_OUTPUT, email_output=EMAIL_OUTPUT):
+        """Simula la ejecución secuencial de CrewAI: callbacks y condición de la tarea de email."""
+        self.kickoffs += 1
+        research = TaskOutput(description="research", agent="researcher", raw=research_output)
+        self.crew.research_business_task.callback(research)
+        self.last_research = research
+        if not self.crew.create_sales_email_task.should_execute(research):
+            return "omitido"
+        self.crew.create_sales_email_task.callback(TaskOutput(description="email", agent="copywriter", raw=email_output))
+        return "ok"
+
+    @patch("crew.LeadGenerationCrew._export_leads")
+    def test_second_run_defers_company(self, _):
+        """Test that a company emailed in one run is skipped by the next run."""
+        inputs = {"company_urls": ["https://acme.com.ar"], "email": "yo@example.com", "output_dir": self.tmp.name}
+        with patch.object(Crew, "kickoff", side_effect=self.fake_kickoff):
+            self.assertEqual(self.crew.run(inputs), "ok")
+            self.assertIsNone(self.crew.run(inputs))  # La URL ya está en cooldown: no se ejecuta la crew
+        self.assertEqual(self.kickoffs, 1)
+
+    @patch("crew.LeadGenerationCrew._export_leads")
+    def test_company_found_through_directory_is_deferred(self, _):
+        """Test that a contacted company reached through another URL skips the email and report stages."""
+        with patch.object(Crew, "kickoff", side_effect=self.fake_kickoff):
+            self.crew.run({"company_urls": ["https://acme.com.ar"], "email": "yo@example.com", "output_dir": self.tmp.name})
+            result = self.crew.run({"company_urls": ["https://directorio.com/software"], "email": "yo@example.com",
+                                    "output_dir": self.tmp.name})
+        self.assertEqual(result, "omitido")
+        self.assertTrue(self.crew.reporting_analyst.report_inputs["outreach_skipped"])
+        report = self.crew.reporting_analyst.execute_task(self.crew.create_report_task)
+        self.assertIn("contactadas recientemente", report)  # Sin llamada al LLM
+        self.assertIn("Encontré una empresa en el directorio:", self.last_research.raw)  # Se conserva la prosa
+        self.assertNotIn("Acme", self.last_research.raw.split("```json")[1])
+
+    @patch("crew.LeadGenerationCrew._export_leads")
+    def test_email_recorded_only_for_named_company(self, _):
+        """Test that one email among several companies is attributed only to the company it names."""
+        research = json.dumps([{"name": name, "industry": "Software", "province": "Córdoba"}
+                               for name in ("Acme S.A.", "Beta", "Gamma")])
+        emails = {"Acme S.A.": None, "Beta": None, "Gamma": None}
+        kickoff = lambda inputs: self.fake_kickoff(inputs, research, "Subject: Propuesta para Acme\n\nHola, ...")
+        with patch.object(Crew, "kickoff", side_effect=kickoff):
+            self.crew.run({"company_urls": ["https://directorio.com"], "email": "yo@example.com", "output_dir": self.tmp.name})
+        for company, email in self.crew._paired_emails():
+            emails[company["company_name"]] = email and email["email_subject"]
+        self.assertEqual(emails, {"Acme S.A.": "Propuesta para Acme", "Beta": None, "Gamma": None})
+        pending, deferred = self.crew.sent_history.filter_companies(
+            [{"company_name": name} for name in emails], profile_key({"email": "yo@example.com"}))
+        self.assertEqual([c["company_name"] for c in deferred], ["Acme S.A."])
+        self.assertEqual([c["company_name"] for c in pending], ["Beta", "Gamma"])
+
+    def test_emails_matched_by_name_not_position(self):
+        """Test that a skipped company does not shift the emails of the others."""
+        self.crew._run_companies = [{"company_name": name} for name in ("Acme", "Acme Logística", "Beta")]
+        self.crew._run_emails = [
+            {"email_subject": "Hola", "email_body": "Equipo de Beta: ..."},
+            {"email_subject": "Propuesta para Acme Logística", "email_body": "..."},
+            {"company_name": "Gamma", "email_subject": "Hola", "email_body": "Acme ..."},
+        ]
+        paired = [(company["company_name"], email and email["email_subject"]) for company, email in self.crew._paired_emails()]
+        self.assertEqual(paired, [("Acme", None), ("Acme Logística", "Propuesta para Acme Logística"), ("Beta", "Hola")])
+
+
+if __name__ == '__main__':
+    unittest.main()
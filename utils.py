@@ -11,6 +11,9 @@ import functools
 import time
 import re
 import yaml
+import copy
+import hashlib
+import threading
 
 # --- Configuración de Logging ---
 def setup_logger(name):
@@ -161,6 +164,46 @@ def _decorated_check_lead_exists(*args, **kwargs): #Auxiliar
 
 check_lead_exists = retry_with_logging(_decorated_check_lead_exists, allowed_exceptions=(Exception,)) #Decorador
 
+# --- Caché de Archivos (Configuración y Perfil) ---
+
+class FileCache:
+    """Caché en proceso de archivos ya parseados/validados, segura entre hilos.
+
+    Se invalida cuando cambian el mtime o el tamaño del archivo; si el contenido
+    (hash) es el mismo, se reutiliza el valor sin volver a parsearlo.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.RLock()
+
+    def get(self, filepath: str, loader: Callable[[str], Any]) -> Any:
+        """Devuelve una copia del valor cacheado, recargando con `loader(texto)` si el archivo cambió."""
+        key = os.path.abspath(filepath)
+        stat = os.stat(key)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry["signature"] != signature:
+                with open(key, "rb") as f:
+                    raw = f.read()
+                digest = hashlib.sha256(raw).hexdigest()
+                if entry is None or entry["digest"] != digest:
+                    logger.debug(f"Parseando {key} (caché invalidada)")
+                    entry = {"value": loader(raw.decode("utf-8")), "digest": digest}
+                entry["signature"] = signature
+                self._entries[key] = entry
+            return copy.deepcopy(entry["value"])  # Los llamadores pueden modificar su copia
+
+    def invalidate(self, filepath: Optional[str] = None) -> None:
+        with self._lock:
+            if filepath is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(os.path.abspath(filepath), None)
+
+file_cache = FileCache()
+
 # --- Funciones de Archivo (Perfil) ---
 
 def save_profile_data(data: Dict[str, Any], filename: str = "profile_data.json") -> None:
@@ -176,25 +219,27 @@ def save_profile_data(data: Dict[str, Any], filename: str = "profile_data.json")
 
     with open(filepath, "w", encoding="utf-8") as f:
         json.dump(data_to_save, f, ensure_ascii=False, indent=4)  # Usa la copia modificada
+    file_cache.invalidate(filepath)
     logger.info(f"Datos del perfil guardados exitosamente en {filepath}")
 
+def _parse_profile(text: str) -> Dict[str, Any]:
+    validated_data = UserProfile(**json.loads(text))  # Valida
+    logger.info("Datos del perfil cargados y validados exitosamente")
+    return validated_data.model_dump()
+
 def load_profile_data(filename: str = "profile_data.json") -> Optional[Dict[str, Any]]:
     logger.debug(f"Cargando datos del perfil desde: {filename}")
     filepath = os.path.join("outputs", filename)
     if os.path.exists(filepath):
-        with open(filepath, "r", encoding="utf-8") as f:
-            try:
-                data = json.load(f)
-                # Validación con Pydantic después de cargar
-                validated_data = UserProfile(**data)  # Valida
-                logger.info(f"Datos del perfil cargados y validados exitosamente desde {filepath}")
-                return validated_data.model_dump()  # Devuelve como diccionario
-            except ValidationError as e:
-                logger.error(f"Error de validación al cargar el perfil: {e}")
-                return None  # O considera lanzar la excepción
-            except json.JSONDecodeError:
-                logger.error(f"Error al decodificar JSON desde {filepath}")
-                return None # O lanza el error
+        try:
+            # Validación con Pydantic después de cargar (solo si el archivo cambió)
+            return file_cache.get(filepath, _parse_profile)  # Devuelve como diccionario
+        except ValidationError as e:
+            logger.error(f"Error de validación al cargar el perfil: {e}")
+            return None  # O considera lanzar la excepción
+        except json.JSONDecodeError:
+            logger.error(f"Error al decodificar JSON desde {filepath}")
+            return None # O lanza el error
 
     else:
         logger.warning(f"Archivo de perfil no encontrado: {filepath}")
@@ -204,10 +249,9 @@ def load_yaml_config(filepath: str) -> Optional[Dict[str, Any]]:
     """Carga un archivo YAML y lo devuelve como un diccionario."""
     logger.debug(f"Cargando configuración YAML desde: {filepath}")
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            config = yaml.safe_load(f)
-            logger.debug(f"YAML cargado: {config}")  # Imprime el contenido!
-            return config
+        config = file_cache.get(filepath, yaml.safe_load)  # Solo se re-parsea si el archivo cambió
+        logger.debug(f"YAML cargado: {config}")  # Imprime el contenido!
+        return config
     except FileNotFoundError:
         logger.error(f"Archivo YAML no encontrado: {filepath}")
         return None